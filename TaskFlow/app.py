@@ -3,15 +3,32 @@ import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.schema import CreateIndex
 from werkzeug.middleware.proxy_fix import ProxyFix
+from .sqlite_profile import is_sqlite_file, sqlite_engine_options, install_sqlite_pragmas
+from .replicas import RoutingSession, replica_binds, replica_router
+from .log_pipeline import configure_logging, install_request_ids
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
+
+
+def install_indexes():
+    """Create any declared index missing from an existing database.
+    
+    db.create_all() skips tables that already exist, indexes included, so
+    databases created by older releases would otherwise never get indexes
+    added since. IF NOT EXISTS makes this safe to run from every worker.
+    Uses only db.metadata, so it works whatever order modules load in.
+    """
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
 
 # Create the app
 app = Flask(__name__)
@@ -27,11 +44,165 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 }
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# SQLite production profile, used whenever the database is a SQLite file:
+# WAL lets readers run alongside the single writer, synchronous=NORMAL is
+# durable under WAL except on power loss, and writes that still hit the lock
+# after busy_timeout are retried SQLITE_WRITE_RETRIES times with backoff
+app.config["SQLITE_JOURNAL_MODE"] = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+app.config["SQLITE_SYNCHRONOUS"] = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+app.config["SQLITE_MMAP_SIZE"] = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+app.config["SQLITE_CACHE_SIZE"] = int(os.environ.get("SQLITE_CACHE_SIZE", -64000))  # negative = KiB
+app.config["SQLITE_POOL_SIZE"] = int(os.environ.get("SQLITE_POOL_SIZE", 10))
+app.config["SQLITE_POOL_OVERFLOW"] = int(os.environ.get("SQLITE_POOL_OVERFLOW", 20))
+app.config["SQLITE_WRITE_RETRIES"] = int(os.environ.get("SQLITE_WRITE_RETRIES", 5))
+
+if is_sqlite_file(app.config["SQLALCHEMY_DATABASE_URI"]):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_engine_options(app.config)
+
+# Comma-separated read replicas. GET requests and read-only DatabaseHandler
+# methods use them round-robin; writes, and reads after a write in the same
+# request, go to the primary, and a client that just wrote stays on the
+# primary for REPLICA_STICKY_SECONDS. Replicas failing the health check are
+# skipped until they pass again (checked every REPLICA_HEALTH_INTERVAL).
+app.config["DATABASE_REPLICA_URLS"] = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+app.config["SQLALCHEMY_BINDS"] = replica_binds(app.config["DATABASE_REPLICA_URLS"])
+app.config["REPLICA_HEALTH_INTERVAL"] = float(os.environ.get("REPLICA_HEALTH_INTERVAL", 10))
+app.config["REPLICA_STICKY_SECONDS"] = float(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+
+# Per-user statistics cache: a shared backend ("redis://..." or "memory://"
+# for the local stand-in) via STATS_CACHE_URL. Without one, an in-process LRU
+# is used only when a single process serves the app, since it cannot see
+# other processes' invalidations; otherwise statistics are not cached. Set
+# WEB_CONCURRENCY (which gunicorn also reads for its worker count) to the
+# total number of serving processes, counting the async API tier
+app.config["STATS_CACHE_URL"] = os.environ.get("STATS_CACHE_URL")
+app.config["WEB_CONCURRENCY"] = int(os.environ.get("WEB_CONCURRENCY", 1))
+app.config["STATS_CACHE_TTL"] = int(os.environ.get("STATS_CACHE_TTL", 30))
+app.config["STATS_CACHE_SIZE"] = int(os.environ.get("STATS_CACHE_SIZE", 1024))
+
+# Password hashing policy and the bounded pool that runs it. Cost means log2
+# rounds for bcrypt, N for scrypt and iterations for pbkdf2; blank uses the
+# algorithm's default. Hashes with other parameters are upgraded on login.
+app.config["PASSWORD_HASH_ALGORITHM"] = os.environ.get("PASSWORD_HASH_ALGORITHM", "scrypt")
+app.config["PASSWORD_HASH_COST"] = os.environ.get("PASSWORD_HASH_COST") or None
+app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+app.config["PASSWORD_HASH_QUEUE_SIZE"] = int(os.environ.get("PASSWORD_HASH_QUEUE_SIZE", 16))
+app.config["PASSWORD_HASH_TIMEOUT"] = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+# Request/DB/template metrics served at /metrics, and ?profile=1 cProfile
+# dumps (never enable profiling on a public deployment). Both are off by
+# default; when METRICS_TOKEN is set, scrapes must send it as a bearer token
+app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "0") == "1"
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN") or None
+app.config["PROFILING_ENABLED"] = os.environ.get("PROFILING_ENABLED", "0") == "1"
+
+# Development/test SQL auditing: per-request statement counts, N+1 warnings
+# for statements repeated QUERY_AUDIT_REPEAT_THRESHOLD times, EXPLAIN plans
+# for queries slower than QUERY_AUDIT_SLOW_MS, and @query_budget limits that
+# raise QueryBudgetExceeded when QUERY_AUDIT_RAISE=1 (use it in test runs)
+app.config["QUERY_AUDIT_ENABLED"] = os.environ.get("QUERY_AUDIT_ENABLED", "0") == "1"
+app.config["QUERY_AUDIT_SLOW_MS"] = float(os.environ.get("QUERY_AUDIT_SLOW_MS", 100))
+app.config["QUERY_AUDIT_REPEAT_THRESHOLD"] = int(os.environ.get("QUERY_AUDIT_REPEAT_THRESHOLD", 5))
+app.config["QUERY_AUDIT_RAISE"] = os.environ.get("QUERY_AUDIT_RAISE", "0") == "1"
+
+# Async JSON API (TaskFlow.async_api:asgi_app, served by an ASGI server such
+# as uvicorn). Defaults to DATABASE_URL with its async driver (aiosqlite or
+# asyncpg); SESSION_SECRET must be shared with the sync app for logins to carry over
+app.config["ASYNC_DATABASE_URL"] = os.environ.get("ASYNC_DATABASE_URL")
+app.config["ASYNC_POOL_SIZE"] = int(os.environ.get("ASYNC_POOL_SIZE", 20))
+app.config["ASYNC_POOL_OVERFLOW"] = int(os.environ.get("ASYNC_POOL_OVERFLOW", 40))
+
+# ETags on /api/tasks and /api/statistics come from a per-user version that
+# every task write bumps. Overdue flags also change with the clock, so ETags
+# roll over every ETAG_TIME_BUCKET seconds even when nothing was written
+app.config["ETAG_TIME_BUCKET"] = int(os.environ.get("ETAG_TIME_BUCKET", 60))
+
+# Background jobs, run by "python -m TaskFlow.worker" with JOB_WORKERS threads
+# polling every JOB_POLL_INTERVAL seconds. Failed jobs retry up to
+# JOB_MAX_ATTEMPTS times with exponential backoff from JOB_RETRY_DELAY to
+# JOB_RETRY_MAX_DELAY; jobs still running after JOB_LOCK_TIMEOUT are assumed
+# lost and requeued. Deferred imports are spooled to JOB_SPOOL_DIR, which the
+# web and worker processes must share
+app.config["JOB_WORKERS"] = int(os.environ.get("JOB_WORKERS", 4))
+app.config["JOB_POLL_INTERVAL"] = float(os.environ.get("JOB_POLL_INTERVAL", 1))
+app.config["JOB_MAX_ATTEMPTS"] = int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+app.config["JOB_RETRY_DELAY"] = float(os.environ.get("JOB_RETRY_DELAY", 5))
+app.config["JOB_RETRY_MAX_DELAY"] = float(os.environ.get("JOB_RETRY_MAX_DELAY", 600))
+app.config["JOB_LOCK_TIMEOUT"] = float(os.environ.get("JOB_LOCK_TIMEOUT", 900))
+app.config["JOB_SPOOL_DIR"] = os.environ.get("JOB_SPOOL_DIR") or os.path.join(os.getcwd(), 'job_spool')
+
+# The worker refreshes per-user overdue/due-soon summaries whose counts the
+# clock has changed every DEADLINE_SWEEP_INTERVAL seconds; until then, reads
+# of an outdated summary fall back to the open-task index
+app.config["DEADLINE_SWEEP_INTERVAL"] = float(os.environ.get("DEADLINE_SWEEP_INTERVAL", 60))
+
+# Delta sync (GET /api/tasks/changes). Tokens trail the clock by
+# SYNC_GRACE_SECONDS so slow-committing writes are not skipped; tombstones of
+# deleted tasks are kept SYNC_TOMBSTONE_DAYS (older tokens must sync from
+# scratch) and the worker prunes them every SYNC_PRUNE_INTERVAL seconds
+app.config["SYNC_GRACE_SECONDS"] = float(os.environ.get("SYNC_GRACE_SECONDS", 5))
+app.config["SYNC_TOMBSTONE_DAYS"] = int(os.environ.get("SYNC_TOMBSTONE_DAYS", 30))
+app.config["SYNC_PRUNE_INTERVAL"] = float(os.environ.get("SYNC_PRUNE_INTERVAL", 3600))
+
+# Task change events streamed to browsers from /api/events. In-process by
+# default; set EVENTS_URL ("redis://..." or "memory://" for the local
+# stand-in) so writes in one worker reach streams held by another. Each
+# stream is one long request that ties up a sync worker for up to
+# EVENTS_MAX_STREAM_SECONDS, so pages only open streams when EVENTS_ENABLED=1;
+# turn it on only with threaded (gthread/gevent) workers
+app.config["EVENTS_ENABLED"] = os.environ.get("EVENTS_ENABLED", "0") == "1"
+app.config["EVENTS_URL"] = os.environ.get("EVENTS_URL")
+app.config["EVENTS_QUEUE_SIZE"] = int(os.environ.get("EVENTS_QUEUE_SIZE", 100))
+app.config["EVENTS_HEARTBEAT"] = float(os.environ.get("EVENTS_HEARTBEAT", 15))
+app.config["EVENTS_MAX_STREAM_SECONDS"] = float(os.environ.get("EVENTS_MAX_STREAM_SECONDS", 300))
+
+# How long a logged-in user's id/username is reused without querying users
+app.config["SESSION_USER_CACHE_TTL"] = int(os.environ.get("SESSION_USER_CACHE_TTL", 60))
+app.config["SESSION_USER_CACHE_SIZE"] = int(os.environ.get("SESSION_USER_CACHE_SIZE", 4096))
+
+# Logging goes through a bounded queue to a background writer thread, as
+# JSON lines (LOG_FORMAT=json) or plain text. LOG_LEVELS sets per-logger
+# levels ("TaskFlow.routes=DEBUG,sqlalchemy=WARNING") and LOG_SAMPLE_RATES
+# keeps a fraction of INFO/DEBUG records from chatty loggers
+# ("TaskFlow.database_handler=0.1"); warnings and errors are always kept
+app.config["LOG_LEVEL"] = os.environ.get("LOG_LEVEL", "INFO")
+app.config["LOG_LEVELS"] = os.environ.get("LOG_LEVELS", "sqlalchemy=WARNING,werkzeug=INFO")
+app.config["LOG_FORMAT"] = os.environ.get("LOG_FORMAT", "json")
+app.config["LOG_SAMPLE_RATES"] = os.environ.get("LOG_SAMPLE_RATES", "")
+app.config["LOG_QUEUE_SIZE"] = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+
+configure_logging(app.config)
+install_request_ids(app)
+
 # Initialize the app with the extension
 db.init_app(app)
+replica_router.init_app(app, db)
 
 with app.app_context():
-    # Import models to ensure tables are created
-    from . import models  # noqa: F401
-    db.create_all()
-    logging.info("Database tables created successfully")
\ No newline at end of file
+    for engine in db.engines.values():
+        if is_sqlite_file(str(engine.url)):
+            install_sqlite_pragmas(engine, app.config)
+
+
+def init_database():
+    """Create tables, missing indexes, counter rows and the search index.
+    
+    Called once from the bottom of models.py, when every model is defined,
+    so the schema is complete whichever TaskFlow module is imported first.
+    """
+    with app.app_context():
+        db.create_all()
+        install_indexes()
+        logger.info("Database tables created successfully")
+        
+        from .database_handler import DatabaseHandler
+        DatabaseHandler().backfill_task_counters()
+        
+        from .search import task_search_index
+        task_search_index.install()
+
+
+# Import models to ensure tables are created; a no-op if models.py is the
+# module being imported, in which case it calls init_database() itself
+from . import models  # noqa: E402,F401
\ No newline at end of file
@@ -0,0 +1,464 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+from flask_login.utils import decode_cookie
+from itsdangerous import BadSignature
+from sqlalchemy import select, and_
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.http import http_date, parse_date, parse_etags
+from .app import app
+from .auth import SessionUser
+from .cache import session_user_cache, stats_cache, LRUCache, NullCache
+from .database_handler import DatabaseHandler, SyncTokenExpiredError
+from .events import LocalBroker
+from .models import User, Task, UserTaskCounter, TaskDeletion
+from .serializers import TaskRowSerializer, parse_fields, dumps
+from .sqlite_profile import is_sqlite_file, install_sqlite_pragmas
+from .log_pipeline import bind_request_id, reset_request_id, current_request_id
+
+logger = logging.getLogger(__name__)
+
+# Async driver used for each sync database backend
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+# Same page sizes as the sync API
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Largest request body accepted
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class APIError(Exception):
+    """An error response: HTTP status plus the message returned as {'error': ...}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def async_database_url(config):
+    """ASYNC_DATABASE_URL, or the sync database URL switched to its async driver"""
+    if config.get('ASYNC_DATABASE_URL'):
+        return config['ASYNC_DATABASE_URL']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for database backend: {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class Request:
+    """The parts of an ASGI HTTP request the API handlers need"""
+
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope['query_string'].decode('latin-1')
+        self.args = {key: values[0] for key, values in parse_qs(self.query_string).items()}
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self.body = body
+
+    def get_json(self):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            raise APIError(400, 'Invalid JSON')
+
+    def get_int(self, name, default):
+        try:
+            return int(self.args[name])
+        except (KeyError, ValueError):
+            return default
+
+
+class AsyncTaskAPI:
+    """ASGI app serving the JSON task API on an AsyncSession.
+
+    Runs as its own process next to the WSGI app and answers the same
+    /api/tasks, /api/tasks/changes and /api/statistics requests with the
+    same JSON and ETags, so a proxy can send API paths here. Logins come
+    from the Flask session cookie or Flask-Login's remember cookie.
+    Statements, validation and ETags are shared with DatabaseHandler.
+
+    Writes here only reach the sync tier's statistics cache and event
+    streams through shared backends (STATS_CACHE_URL, EVENTS_URL); a
+    process-local statistics cache is therefore never used in this tier.
+    """
+
+    def __init__(self, flask_app, database_url, handler=None):
+        self.flask_app = flask_app
+        if handler is None:
+            # A local LRU would not see the sync tier's invalidations, nor it ours
+            handler = DatabaseHandler(stats_cache=NullCache() if isinstance(stats_cache, LRUCache) else None)
+        self.handler = handler
+        if flask_app.config['EVENTS_ENABLED'] and isinstance(self.handler.events, LocalBroker):
+            logger.warning("EVENTS_URL is not set; writes through the async API will not reach /api/events streams")
+
+        options = {
+            'pool_size': flask_app.config['ASYNC_POOL_SIZE'],
+            'max_overflow': flask_app.config['ASYNC_POOL_OVERFLOW'],
+        }
+        sqlite_file = is_sqlite_file(database_url)
+        if not sqlite_file:
+            options.update(pool_recycle=300, pool_pre_ping=True)
+        self.engine = create_async_engine(database_url, **options)
+        if sqlite_file:
+            install_sqlite_pragmas(self.engine.sync_engine, flask_app.config)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+        if not os.environ.get('SESSION_SECRET') and not os.environ.get('FLASK_SECRET'):
+            logger.warning("SESSION_SECRET is not set; the async API cannot read sessions from other processes")
+        self.serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+
+        self.routes = [
+            ('GET', re.compile(r'^/api/tasks$'), self.list_tasks),
+            ('POST', re.compile(r'^/api/tasks$'), self.create_task),
+            ('GET', re.compile(r'^/api/tasks/changes$'), self.task_changes),
+            ('GET', re.compile(r'^/api/tasks/(?P<task_id>\d+)$'), self.get_task),
+            ('PUT', re.compile(r'^/api/tasks/(?P<task_id>\d+)$'), self.update_task),
+            ('DELETE', re.compile(r'^/api/tasks/(?P<task_id>\d+)$'), self.delete_task),
+            ('GET', re.compile(r'^/api/statistics$'), self.statistics),
+        ]
+        # Views answered with 304 while the user's task version is unchanged
+        self.versioned = {self.list_tasks, self.task_changes, self.statistics}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        incoming = dict(scope['headers']).get(b'x-request-id', b'').decode('latin-1')
+        token = bind_request_id(incoming)
+        try:
+            try:
+                request = Request(scope, await self._read_body(receive))
+                status, payload, extra_headers = await self.dispatch(request)
+            except APIError as e:
+                status, payload, extra_headers = e.status, {'error': e.message}, {}
+
+            # 304 responses carry no body
+            body = dumps(payload) if payload is not None else b''
+            headers = [
+                (b'content-length', str(len(body)).encode()),
+                (b'x-request-id', current_request_id().encode('latin-1')),
+            ]
+            if payload is not None:
+                headers.append((b'content-type', b'application/json'))
+            headers += [(name.encode('latin-1'), value.encode('latin-1')) for name, value in extra_headers.items()]
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': headers,
+            })
+            await send({'type': 'http.response.body', 'body': body})
+        finally:
+            reset_request_id(token)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise APIError(413, 'Request body too large')
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def dispatch(self, request):
+        """Route, authenticate and run one request; returns (status, payload, headers)"""
+        path_matched = False
+        for method, pattern, view in self.routes:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            path_matched = True
+            if method != request.method:
+                continue
+
+            async with self.sessionmaker() as session:
+                user_id = await self.authenticate(request, session)
+                kwargs = {k: int(v) for k, v in match.groupdict().items()}
+                try:
+                    if view in self.versioned:
+                        return await self._conditional(request, session, user_id, view, kwargs)
+                    return self._with_headers(await view(request, session, user_id, **kwargs))
+                except APIError:
+                    raise
+                except Exception as e:
+                    await session.rollback()
+                    logger.error("Async API error on %s %s: %s", request.method, request.path, e)
+                    raise APIError(500, 'Internal server error')
+
+        raise APIError(405 if path_matched else 404, 'Method not allowed' if path_matched else 'Not found')
+
+    @staticmethod
+    def _with_headers(result):
+        """Normalize a view's (status, payload[, headers]) to a 3-tuple"""
+        return result if len(result) == 3 else (*result, {})
+
+    async def _conditional(self, request, session, user_id, view, kwargs):
+        """Async counterpart of routes.conditional_on_task_version"""
+        version = (await session.execute(self.handler.task_version_statement(user_id))).scalar() or 0
+        etag = self.handler.task_etag(user_id, version, request.path, request.query_string)
+        headers = {'etag': f'"{etag}"', 'cache-control': 'private, no-cache'}
+        if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+            return 304, None, headers
+
+        status, payload, view_headers = self._with_headers(await view(request, session, user_id, **kwargs))
+        if status != 200:
+            return status, payload, view_headers
+        return status, payload, {**view_headers, **headers}
+
+    def _session_data(self, cookies):
+        """The signed Flask session, or {} if it is missing or invalid"""
+        cookie = cookies.get(self.flask_app.config['SESSION_COOKIE_NAME'])
+        if cookie is None:
+            return {}
+        try:
+            return self.serializer.loads(
+                cookie.value, max_age=int(self.flask_app.permanent_session_lifetime.total_seconds())
+            )
+        except (BadSignature, TypeError, ValueError):
+            return {}
+
+    async def authenticate(self, request, session):
+        """Return the logged-in user's id from the Flask session or remember cookie"""
+        cookies = SimpleCookie(request.headers.get('cookie', ''))
+        data = self._session_data(cookies)
+        user_id = data.get('_user_id')
+        if user_id is None:
+            # Same fallback Flask-Login uses once the session has expired
+            remember = cookies.get(self.flask_app.config.get('REMEMBER_COOKIE_NAME', 'remember_token'))
+            if remember is not None:
+                user_id = decode_cookie(remember.value, key=self.flask_app.secret_key)
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            raise APIError(401, 'Authentication required')
+
+        if session_user_cache.get(user_id) is None:
+            row = (await session.execute(select(User.id, User.username).where(User.id == user_id))).first()
+            if row is None:
+                raise APIError(401, 'Authentication required')
+            session_user_cache.set(user_id, SessionUser(row.id, row.username))
+        return user_id
+
+    # Views: same request and response contract as the sync /api routes
+    async def list_tasks(self, request, session, user_id):
+        limit = max(1, min(request.get_int('limit', DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        try:
+            serializer = TaskRowSerializer(parse_fields(request.args.get('fields')))
+        except ValueError as e:
+            raise APIError(400, str(e))
+        try:
+            statement = self.handler.tasks_page_statement(
+                user_id, request.args.get('status'), request.args.get('priority'),
+                limit=limit, cursor=request.args.get('cursor'), columns=serializer.columns
+            )
+        except ValueError:
+            raise APIError(400, 'Invalid cursor')
+
+        rows, next_cursor = self.handler.split_page((await session.execute(statement)).all(), limit)
+        tasks_data = serializer.serialize(rows)
+        return 200, {
+            'success': True,
+            'tasks': tasks_data,
+            'count': len(tasks_data),
+            'next_cursor': next_cursor,
+            'user_id': user_id
+        }
+
+    async def task_changes(self, request, session, user_id):
+        limit = max(1, min(request.get_int('limit', MAX_PAGE_SIZE), MAX_PAGE_SIZE))
+        try:
+            serializer = TaskRowSerializer(parse_fields(request.args.get('fields')))
+        except ValueError as e:
+            raise APIError(400, str(e))
+        now = datetime.utcnow()
+        try:
+            position, synced_at = self.handler.open_sync_token(request.args.get('since'), now)
+        except ValueError:
+            raise APIError(400, 'Invalid sync token')
+        except SyncTokenExpiredError:
+            return 410, {'error': 'Sync token expired', 'full_sync_required': True}
+
+        changes = (await session.execute(self.handler.task_changes_statement(user_id, position, limit))).all()
+        live_ids, deleted_ids, next_token, has_more = self.handler.split_changes(changes, limit, position, synced_at, now)
+        rows = []
+        if live_ids:
+            rows = (await session.execute(self.handler.changed_rows_statement(user_id, serializer.columns, live_ids))).all()
+        return 200, {
+            'success': True,
+            'tasks': serializer.serialize(rows),
+            'deleted': deleted_ids,
+            'next_token': next_token,
+            'has_more': has_more
+        }
+
+    async def get_task(self, request, session, user_id, task_id):
+        task = await session.scalar(select(Task).where(Task.id == task_id, Task.user_id == user_id))
+        if task is None:
+            raise APIError(404, 'Task not found')
+
+        # Same validators as the sync route's make_conditional, If-None-Match first
+        etag = hashlib.sha1(f"{task.id}:{task.updated_at.isoformat()}".encode('utf-8')).hexdigest()
+        headers = {
+            'etag': f'"{etag}"',
+            'last-modified': http_date(task.updated_at),
+            'cache-control': 'private, no-cache',
+        }
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            if parse_etags(if_none_match).contains_weak(etag):
+                return 304, None, headers
+        else:
+            since = parse_date(request.headers.get('if-modified-since'))
+            if since is not None and task.updated_at.replace(microsecond=0) <= since.replace(tzinfo=None):
+                return 304, None, headers
+        return 200, {'success': True, 'task': task.to_dict()}, headers
+
+    async def create_task(self, request, session, user_id):
+        data = request.get_json()
+        if not isinstance(data, dict) or not data.get('title'):
+            raise APIError(400, 'Title is required')
+        values, error = self.handler.validate_task_data(data)
+        if error:
+            raise APIError(400, error)
+
+        task = Task(
+            title=values['title'],
+            description=values.get('description'),
+            user_id=user_id,
+            priority=values['priority'],
+            due_date=values.get('due_date')
+        )
+        session.add(task)
+        await session.flush()
+        await self._record_task_change(
+            session, user_id, UserTaskCounter.deltas(task.status, task.priority, 1), deadlines=task.due_date is not None
+        )
+        await session.commit()
+        self.handler.invalidate_task_stats(user_id)
+        self.handler.publish_task_event(user_id, 'task.created', lambda: {'task': task.to_dict()})
+        logger.info("Task created successfully: %s", task.title)
+        return 201, {'success': True, 'task': task.to_dict(), 'message': 'Task created successfully'}
+
+    async def update_task(self, request, session, user_id, task_id):
+        data = request.get_json()
+        if not data:
+            raise APIError(400, 'No data provided')
+        if not isinstance(data, dict):
+            raise APIError(400, 'Task data must be an object')
+        values, error = self.handler.validate_task_data(data, partial=True)
+        if error:
+            raise APIError(400, error)
+
+        values = self.handler.stamp_task_update(values)
+        previous = None
+        counted = 'status' in values or 'priority' in values
+        if counted:
+            previous = (await session.execute(
+                select(Task.status, Task.priority).where(Task.id == task_id, Task.user_id == user_id)
+            )).first()
+            if previous is None:
+                raise APIError(404, 'Task not found')
+
+        task = (await session.execute(
+            self.handler.owned_task_update_statement(task_id, user_id, values)
+        )).scalar_one_or_none()
+        if task is None:
+            await session.rollback()
+            raise APIError(404, 'Task not found')
+
+        await self._record_task_change(
+            session, user_id, self.handler.transition_deltas(previous, task) if counted else {},
+            deadlines=counted or 'due_date' in values
+        )
+        await session.commit()
+        self.handler.invalidate_task_stats(user_id)
+        self.handler.publish_task_event(user_id, 'task.updated', lambda: {'task': task.to_dict()})
+        logger.info("Task updated successfully: %s", task.title)
+        return 200, {'success': True, 'task': task.to_dict(), 'message': 'Task updated successfully'}
+
+    async def delete_task(self, request, session, user_id, task_id):
+        owned = and_(Task.id == task_id, Task.user_id == user_id)
+        deleted = (await session.execute(
+            Task.__table__.delete().where(owned).returning(Task.status, Task.priority)
+        )).first()
+        if deleted is None:
+            await session.rollback()
+            raise APIError(404, 'Task not found')
+
+        await session.execute(TaskDeletion.__table__.insert(), self.handler.task_deletion_rows(user_id, [task_id]))
+        await self._record_task_change(session, user_id, UserTaskCounter.deltas(deleted.status, deleted.priority, -1))
+        await session.commit()
+        self.handler.invalidate_task_stats(user_id)
+        self.handler.publish_task_event(user_id, 'task.deleted', {'id': task_id})
+        logger.info("Task deleted successfully: %s", task_id)
+        return 200, {'success': True, 'message': 'Task deleted successfully'}
+
+    async def statistics(self, request, session, user_id):
+        counts = self.handler.cached_task_counts(user_id)
+        if counts is None:
+            rows = (await session.execute(self.handler.task_counts_statement(user_id))).all()
+            counts = self.handler.summarize_task_counts(rows)
+            counts.update(await self._deadline_summary(session, user_id))
+            self.handler.cache_task_counts(user_id, counts)
+        return 200, {
+            'success': True,
+            'user_statistics': counts['user_stats'],
+            'priority_statistics': counts['priority_stats'],
+            'overdue_tasks': counts['overdue_count'],
+            'tasks_due_soon': counts['due_soon_count']
+        }
+
+    async def _deadline_summary(self, session, user_id):
+        """Async counterpart of DatabaseHandler.get_deadline_summary"""
+        now = datetime.utcnow()
+        row = (await session.execute(self.handler.deadline_summary_statement(user_id))).first()
+        counts = self.handler.current_deadline_summary(row, now)
+        if counts is None:
+            row = (await session.execute(self.handler.deadline_summary_source(now, [user_id]))).first()
+            counts = self.handler.deadline_counts(row)
+        return counts
+
+    async def _record_task_change(self, session, user_id, deltas, deadlines=True):
+        """Async counterpart of DatabaseHandler._record_task_change"""
+        statement = self.handler.counter_update_statement(user_id, deltas)
+        if statement is not None and (await session.execute(statement)).rowcount == 0:
+            for rebuild in self.handler.rebuild_user_counter_statements(user_id):
+                await session.execute(rebuild)
+        if (await session.execute(self.handler.version_bump_statement(user_id))).rowcount == 0:
+            await session.execute(self.handler.version_insert_statement(user_id))
+        if deadlines:
+            for statement in self.handler.deadline_refresh_statements([user_id], datetime.utcnow()):
+                await session.execute(statement)
+
+
+asgi_app = AsyncTaskAPI(app, async_database_url(app.config))
@@ -1,7 +1,12 @@
+import logging
 from flask_login import LoginManager
+from sqlalchemy import select, exists
 from .models import User
 from email_validator import validate_email, EmailNotValidError # <-- THIS LINE IS THE FIX
-from .app import app
+from .app import app, db
+from .cache import session_user_cache
+
+logger = logging.getLogger(__name__)
 
 # Initialize login manager
 login_manager = LoginManager()
@@ -10,10 +15,52 @@ login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 login_manager.login_message_category = 'info'
 
+class SessionUser:
+    """Lightweight principal for the logged-in user.
+    
+    Holds only what routes and templates need on every request; call
+    get_user() when the full User row is actually required.
+    """
+    __slots__ = ('id', 'username')
+    
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+    
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+    
+    def get_id(self):
+        """Return the identifier Flask-Login stores in the session"""
+        return str(self.id)
+    
+    def get_user(self):
+        """Load the full User row for this principal"""
+        return db.session.get(User, self.id)
+    
+    def __repr__(self):
+        return f'<SessionUser {self.username}>'
+
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user by ID for Flask-Login"""
-    return User.query.get(int(user_id))
+    """Load the session principal for Flask-Login, querying only on a cache miss"""
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        return None
+    
+    principal = session_user_cache.get(user_id)
+    if principal is None:
+        row = db.session.execute(
+            select(User.id, User.username).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        principal = SessionUser(row.id, row.username)
+        session_user_cache.set(user_id, principal)
+    
+    return principal
 
 class AuthenticationError(Exception):
     """Custom exception for authentication errors"""
@@ -28,6 +75,15 @@ class AuthHandler:
         user = User.query.filter_by(username=username).first()
         
         if user and user.check_password(password):
+            # Transparently upgrade hashes made with outdated parameters
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                    logger.info("Password hash upgraded for user: %s", user.username)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error("Error upgrading password hash: %s", e)
             return user
         
         return None
@@ -37,17 +93,21 @@ class AuthHandler:
         """Validate user registration data"""
         errors = []
         
-        # Check if username already exists
-        if User.query.filter_by(username=username).first():
+        # Check username and email availability in a single round-trip
+        taken = db.session.execute(
+            select(
+                exists().where(User.username == username).label('username'),
+                exists().where(User.email == email).label('email')
+            )
+        ).one()
+        if taken.username:
             errors.append('Username already exists')
-        
-        # Check if email already exists
-        if User.query.filter_by(email=email).first():
+        if taken.email:
             errors.append('Email already exists')
 
-        # Use a robust library for email validation
+        # Syntax-only validation: deliverability checks would block on DNS
         try:
-            validate_email(email)
+            validate_email(email, check_deliverability=False)
         except EmailNotValidError as e:
             errors.append(str(e))
         
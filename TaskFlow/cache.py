@@ -0,0 +1,173 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from .app import app
+
+logger = logging.getLogger(__name__)
+
+
+class StatsCache:
+    """Interface for caches holding per-user task statistics"""
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """Store a JSON-serializable value under key"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove key from the cache if present"""
+        raise NotImplementedError
+
+
+class NullCache(StatsCache):
+    """Cache that stores nothing, so every read goes to the database"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+
+class LRUCache(StatsCache):
+    """In-process LRU cache with a per-entry TTL.
+
+    Only invalidations made by this process are seen, so it is only safe for
+    statistics when a single process serves the app.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SharedStatsCache(StatsCache):
+    """Cache stored in a shared key-value server such as Redis.
+
+    The client only needs get/setex/delete, so LocalSharedClient can stand
+    in for a real server in tests and local development. Backend errors are
+    logged and treated as misses, so a cache outage slows requests down
+    instead of failing them.
+    """
+
+    def __init__(self, client, ttl=30, prefix='taskflow:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning("Statistics cache read failed: %s", e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        try:
+            self.client.setex(self.prefix + key, self.ttl, json.dumps(value))
+        except Exception as e:
+            logger.warning("Statistics cache write failed: %s", e)
+
+    def delete(self, key):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            # The entry may outlive this write until its TTL runs out
+            logger.error("Statistics cache invalidation failed: %s", e)
+
+
+class LocalSharedClient:
+    """In-memory stand-in for the subset of the Redis client API we use"""
+
+    def __init__(self):
+        self._store = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._store.get(name)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._store[name]
+                return None
+            return value
+
+    def setex(self, name, time_seconds, value):
+        with self._lock:
+            self._store[name] = (time.monotonic() + time_seconds, value)
+
+    def delete(self, name):
+        with self._lock:
+            self._store.pop(name, None)
+
+
+def create_stats_cache(config):
+    """Build the statistics cache described by the app config"""
+    url = config.get('STATS_CACHE_URL')
+    ttl = config.get('STATS_CACHE_TTL', 30)
+
+    if not url:
+        if config.get('WEB_CONCURRENCY', 1) > 1:
+            logger.warning("No STATS_CACHE_URL for %s processes; statistics will not be cached",
+                           config['WEB_CONCURRENCY'])
+            return NullCache()
+        return LRUCache(maxsize=config.get('STATS_CACHE_SIZE', 1024), ttl=ttl)
+
+    if url == 'memory://':
+        return SharedStatsCache(LocalSharedClient(), ttl=ttl)
+
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("STATS_CACHE_URL points at Redis but the 'redis' package is not installed") from e
+        logger.info("Using Redis statistics cache")
+        return SharedStatsCache(redis.Redis.from_url(url), ttl=ttl)
+
+    raise ValueError(f"Unsupported STATS_CACHE_URL: {url}")
+
+
+stats_cache = create_stats_cache(app.config)
+
+# Lightweight principals for authenticated requests, keyed by user id.
+# Entries hold no secrets, so a process-local cache with a short TTL is enough.
+session_user_cache = LRUCache(
+    maxsize=app.config.get('SESSION_USER_CACHE_SIZE', 4096),
+    ttl=app.config.get('SESSION_USER_CACHE_TTL', 60)
+)
@@ -0,0 +1,30 @@
+import click
+from .app import app
+from .database_handler import DatabaseHandler
+from .jobs import job_queue
+
+
+@app.cli.command('rebuild-task-counters')
+@click.option('--background', is_flag=True, help='Enqueue the rebuild for the job worker instead of running it here.')
+def rebuild_task_counters(background):
+    """Recompute user_task_counters from the tasks table."""
+    if background:
+        job = job_queue.enqueue('rebuild_task_counters')
+        click.echo(f"Enqueued job {job.id}")
+        return
+    count = DatabaseHandler().rebuild_task_counters()
+    click.echo(f"Rebuilt task counters for {count} users")
+
+
+@app.cli.command('sweep-deadlines')
+def sweep_deadlines():
+    """Refresh outdated or missing per-user deadline summaries."""
+    count = DatabaseHandler().sweep_deadline_summaries()
+    click.echo(f"Refreshed deadline summaries for {count} users")
+
+
+@app.cli.command('prune-task-deletions')
+def prune_task_deletions():
+    """Delete task tombstones older than SYNC_TOMBSTONE_DAYS."""
+    count = DatabaseHandler().prune_task_deletions()
+    click.echo(f"Pruned {count} task tombstones")
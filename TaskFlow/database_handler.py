@@ -1,27 +1,96 @@
-from .app import db
-from .models import User, Task
-from sqlalchemy import func, and_, or_, case
-from datetime import datetime, timedelta
+from .app import app, db
+from .models import User, Task, UserTaskCounter, UserTaskVersion, UserDeadlineSummary, TaskDeletion, Job
+from .search import task_search_index
+from .cache import stats_cache as default_stats_cache, session_user_cache
+from .events import event_broker as default_event_broker
+from .sqlite_profile import is_lock_error
+from .replicas import replica_read
+from .serializers import TaskRowSerializer
+from sqlalchemy import func, and_, or_, case, select, literal, union_all, insert, update, exists
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import contains_eager, joinedload
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+import base64
+import functools
+import hashlib
 import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# First delay between retries of a write that found the database locked
+LOCK_RETRY_DELAY = 0.05
+
+
+def retry_on_lock(method):
+    """Re-run a write method when SQLite reports the database as locked.
+    
+    busy_timeout already waits for the lock, but a deferred transaction that
+    read before writing fails at once if another writer got in first, so the
+    whole method is retried with jittered exponential backoff. Each decorated
+    method must be a complete unit of work that commits on its own.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        retries = app.config['SQLITE_WRITE_RETRIES']
+        for attempt in range(retries + 1):
+            try:
+                return method(self, *args, **kwargs)
+            except OperationalError as e:
+                if attempt == retries or not is_lock_error(e):
+                    raise
+                self.db.session.rollback()
+                delay = LOCK_RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5)
+                logger.warning("Database locked in %s, retry %s in %.0f ms", method.__name__, attempt + 1, delay * 1000)
+                time.sleep(delay)
+    return wrapper
+
+class DuplicateUserError(Exception):
+    """Raised when a username or email is already registered"""
+    pass
+
+class SyncTokenExpiredError(Exception):
+    """Raised when a sync token predates the retained task tombstones"""
+    pass
 
 class DatabaseHandler:
     """Database handler class following SOLID principles for database operations"""
     
-    def __init__(self):
+    # Window used for the "due soon" dashboard figures
+    DUE_SOON_DAYS = 7
+    
+    # Task columns that callers may change through the update methods
+    UPDATABLE_TASK_FIELDS = ('title', 'description', 'status', 'priority', 'due_date')
+    
+    def __init__(self, stats_cache=None, events=None):
         self.db = db
+        self.stats_cache = stats_cache if stats_cache is not None else default_stats_cache
+        self.events = events if events is not None else default_event_broker
     
     # User operations
+    @retry_on_lock
     def create_user(self, username, email, password):
         """Create a new user"""
         try:
             user = User(username=username, email=email, password=password)
             self.db.session.add(user)
+            self.db.session.flush()
+            self.db.session.add(UserTaskCounter(user_id=user.id))
             self.db.session.commit()
-            logging.info(f"User created successfully: {username}")
+            logger.info("User created successfully: %s", username)
             return user
+        except IntegrityError as e:
+            # Lost a race with a concurrent registration; the unique
+            # constraints are the source of truth
+            self.db.session.rollback()
+            field = 'Email' if 'email' in str(e.orig).lower() else 'Username'
+            logger.info("Duplicate registration rejected: %s", username)
+            raise DuplicateUserError(f'{field} already exists') from e
         except Exception as e:
             self.db.session.rollback()
-            logging.error(f"Error creating user: {str(e)}")
+            logger.error("Error creating user: %s", e)
             raise e
     
     def get_user_by_id(self, user_id):
@@ -36,10 +105,12 @@ class DatabaseHandler:
         """Get user by email"""
         return User.query.filter_by(email=email).first()
     
+    @replica_read
     def get_all_users(self):
         """Get all users"""
         return User.query.all()
     
+    @retry_on_lock
     def update_user(self, user_id, **kwargs):
         """Update user information"""
         try:
@@ -50,30 +121,38 @@ class DatabaseHandler:
                         setattr(user, key, value)
                 user.updated_at = datetime.utcnow()
                 self.db.session.commit()
-                logging.info(f"User updated successfully: {user.username}")
+                session_user_cache.delete(user_id)
+                logger.info("User updated successfully: %s", user.username)
                 return user
             return None
         except Exception as e:
             self.db.session.rollback()
-            logging.error(f"Error updating user: {str(e)}")
+            logger.error("Error updating user: %s", e)
             raise e
     
+    @retry_on_lock
     def delete_user(self, user_id):
         """Delete user and all associated tasks"""
         try:
             user = self.get_user_by_id(user_id)
             if user:
+                for table in (UserTaskCounter.__table__, UserTaskVersion.__table__, UserDeadlineSummary.__table__,
+                              TaskDeletion.__table__, Job.__table__):
+                    self.db.session.execute(table.delete().where(table.c.user_id == user_id))
                 self.db.session.delete(user)
                 self.db.session.commit()
-                logging.info(f"User deleted successfully: {user.username}")
+                self.invalidate_task_stats(user_id)
+                session_user_cache.delete(user_id)
+                logger.info("User deleted successfully: %s", user.username)
                 return True
             return False
         except Exception as e:
             self.db.session.rollback()
-            logging.error(f"Error deleting user: {str(e)}")
+            logger.error("Error deleting user: %s", e)
             raise e
     
     # Task operations
+    @retry_on_lock
     def create_task(self, title, description, user_id, priority='medium', due_date=None):
         """Create a new task"""
         try:
@@ -85,18 +164,29 @@ class DatabaseHandler:
                 due_date=due_date
             )
             self.db.session.add(task)
+            self.db.session.flush()
+            self._record_task_change(
+                user_id, UserTaskCounter.deltas(task.status, task.priority, 1), deadlines=due_date is not None
+            )
             self.db.session.commit()
-            logging.info(f"Task created successfully: {title}")
+            self.invalidate_task_stats(user_id)
+            self.publish_task_event(user_id, 'task.created', lambda: {'task': task.to_dict()})
+            logger.info("Task created successfully: %s", title)
             return task
         except Exception as e:
             self.db.session.rollback()
-            logging.error(f"Error creating task: {str(e)}")
+            logger.error("Error creating task: %s", e)
             raise e
     
     def get_task_by_id(self, task_id):
         """Get task by ID"""
         return Task.query.get(task_id)
     
+    def get_task_for_user(self, task_id, user_id):
+        """Get a task by ID only if it belongs to the given user"""
+        return Task.query.filter_by(id=task_id, user_id=user_id).first()
+    
+    @replica_read
     def get_tasks_by_user(self, user_id, status=None, priority=None):
         """Get tasks for a specific user with optional filters"""
         query = Task.query.filter_by(user_id=user_id)
@@ -108,15 +198,119 @@ class DatabaseHandler:
         
         return query.order_by(Task.created_at.desc()).all()
     
+    @replica_read
+    def get_tasks_page(self, user_id, status=None, priority=None, limit=50, cursor=None):
+        """Get one page of a user's tasks using keyset pagination on (created_at, id)"""
+        statement = self.tasks_page_statement(user_id, status, priority, limit, cursor)
+        return self.split_page(self.db.session.scalars(statement).all(), limit)
+    
+    @replica_read
+    def get_task_rows_page(self, user_id, columns, status=None, priority=None, limit=50, cursor=None):
+        """Like get_tasks_page, but returns plain rows of the given Task columns.
+        
+        columns must include Task.id and Task.created_at for the cursor;
+        TaskRowSerializer.columns always does.
+        """
+        statement = self.tasks_page_statement(user_id, status, priority, limit, cursor, columns=columns)
+        return self.split_page(self.db.session.execute(statement).all(), limit)
+    
+    @classmethod
+    def tasks_page_statement(cls, user_id, status=None, priority=None, limit=50, cursor=None, columns=None):
+        """SELECT for one page of tasks (or just columns), plus one extra row to detect a next page"""
+        statement = select(*columns) if columns else select(Task)
+        statement = statement.where(Task.user_id == user_id)
+        
+        if status:
+            statement = statement.where(Task.status == status)
+        if priority:
+            statement = statement.where(Task.priority == priority)
+        if cursor:
+            created_at, task_id = cls.decode_cursor(cursor)
+            statement = statement.where(
+                or_(
+                    Task.created_at < created_at,
+                    and_(Task.created_at == created_at, Task.id < task_id)
+                )
+            )
+        
+        return statement.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1)
+    
+    @classmethod
+    def split_page(cls, tasks, limit):
+        """Trim the extra row fetched by tasks_page_statement; returns (tasks, next_cursor)"""
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = cls.encode_cursor(tasks[-1])
+        
+        return tasks, next_cursor
+    
+    @classmethod
+    def encode_cursor(cls, task):
+        """Encode the (created_at, id) position of a task as an opaque cursor"""
+        return cls.encode_position(task.created_at, task.id)
+    
+    @staticmethod
+    def encode_position(timestamp, item_id):
+        """Encode a (timestamp, id) keyset position as an opaque token"""
+        raw = f"{timestamp.isoformat()}|{item_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a cursor into (created_at, id); raises ValueError if malformed"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            created_at, task_id = raw.split('|')
+            return datetime.fromisoformat(created_at), int(task_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+    
+    @staticmethod
+    def encode_sync_token(position, synced_at):
+        """Encode a (changed_at, id) sync position and the time the client's copy is complete from"""
+        raw = f"{position[0].isoformat()}|{position[1]}|{synced_at.isoformat()}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_sync_token(token):
+        """Decode a sync token into ((changed_at, id), synced_at); raises ValueError if malformed"""
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+            changed_at, task_id, synced_at = raw.split('|')
+            return (datetime.fromisoformat(changed_at), int(task_id)), datetime.fromisoformat(synced_at)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid sync token: {token}") from e
+    
+    def stream_tasks(self, user_id, batch_size=1000):
+        """Yield a user's tasks as dicts shaped like Task.to_dict(), using a server-side cursor"""
+        now = datetime.utcnow()
+        serializer = TaskRowSerializer()
+        result = self.db.session.execute(
+            select(*serializer.columns)
+            .where(Task.user_id == user_id)
+            .order_by(Task.id)
+            .execution_options(yield_per=batch_size)
+        )
+        
+        try:
+            for row in result:
+                yield serializer.serialize_row(row, now)
+        finally:
+            result.close()
+    
+    @replica_read
     def get_all_tasks(self):
         """Get all tasks"""
         return Task.query.order_by(Task.created_at.desc()).all()
     
+    @retry_on_lock
     def update_task(self, task_id, **kwargs):
         """Update task information"""
         try:
             task = self.get_task_by_id(task_id)
             if task:
+                old_status, old_priority = task.status, task.priority
                 for key, value in kwargs.items():
                     if hasattr(task, key):
                         setattr(task, key, value)
@@ -128,42 +322,720 @@ class DatabaseHandler:
                 elif 'status' in kwargs and kwargs['status'] != 'completed':
                     task.completed_at = None
                 
+                deltas = Counter(UserTaskCounter.deltas(old_status, old_priority, -1))
+                deltas.update(UserTaskCounter.deltas(task.status, task.priority, 1))
+                self._record_task_change(task.user_id, deltas, deadlines='status' in kwargs or 'due_date' in kwargs)
+                
                 self.db.session.commit()
-                logging.info(f"Task updated successfully: {task.title}")
+                self.invalidate_task_stats(task.user_id)
+                self.publish_task_event(task.user_id, 'task.updated', lambda: {'task': task.to_dict()})
+                logger.info("Task updated successfully: %s", task.title)
                 return task
             return None
         except Exception as e:
             self.db.session.rollback()
-            logging.error(f"Error updating task: {str(e)}")
+            logger.error("Error updating task: %s", e)
             raise e
     
+    @retry_on_lock
     def delete_task(self, task_id):
         """Delete task"""
         try:
             task = self.get_task_by_id(task_id)
             if task:
                 self.db.session.delete(task)
+                self.db.session.flush()
+                self._record_task_deletions(task.user_id, [task_id])
+                self._record_task_change(task.user_id, UserTaskCounter.deltas(task.status, task.priority, -1))
                 self.db.session.commit()
-                logging.info(f"Task deleted successfully: {task.title}")
+                self.invalidate_task_stats(task.user_id)
+                self.publish_task_event(task.user_id, 'task.deleted', {'id': task_id})
+                logger.info("Task deleted successfully: %s", task.title)
                 return True
             return False
         except Exception as e:
             self.db.session.rollback()
-            logging.error(f"Error deleting task: {str(e)}")
+            logger.error("Error deleting task: %s", e)
+            raise e
+    
+    # Ownership-scoped task mutations: the owner check is part of the write
+    # statement itself, so no separate fetch is needed beforehand
+    def update_task_for_user(self, task_id, user_id, **kwargs):
+        """Update a task owned by user_id; returns the updated task or None if not found"""
+        values = {key: value for key, value in kwargs.items() if key in self.UPDATABLE_TASK_FIELDS}
+        return self._update_owned_task(task_id, user_id, values)
+    
+    def toggle_task_status_for_user(self, task_id, user_id):
+        """Flip a task owned by user_id between completed and pending; returns the task or None"""
+        previous = self._get_task_state(task_id, user_id)
+        if previous is None:
+            return None
+        new_status = 'completed' if previous.status != 'completed' else 'pending'
+        return self._update_owned_task(task_id, user_id, {'status': new_status}, previous)
+    
+    @retry_on_lock
+    def delete_task_for_user(self, task_id, user_id):
+        """Delete a task owned by user_id in one statement; returns False if not found"""
+        try:
+            owned = and_(Task.id == task_id, Task.user_id == user_id)
+            deleted = self.db.session.execute(
+                Task.__table__.delete().where(owned).returning(Task.status, Task.priority)
+            ).first()
+            if deleted is None:
+                self.db.session.rollback()
+                return False
+            
+            self._record_task_deletions(user_id, [task_id])
+            self._record_task_change(user_id, UserTaskCounter.deltas(deleted.status, deleted.priority, -1))
+            self.db.session.commit()
+            self.invalidate_task_stats(user_id)
+            self.publish_task_event(user_id, 'task.deleted', {'id': task_id})
+            logger.info("Task deleted successfully: %s", task_id)
+            return True
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error deleting task: %s", e)
+            raise e
+    
+    def _get_task_state(self, task_id, user_id):
+        """Fetch just the counter-relevant columns of an owned task"""
+        return self.db.session.execute(
+            select(Task.status, Task.priority).where(Task.id == task_id, Task.user_id == user_id)
+        ).first()
+    
+    @retry_on_lock
+    def _update_owned_task(self, task_id, user_id, values, previous=None):
+        """Run UPDATE ... WHERE id AND user_id RETURNING for an owned task"""
+        try:
+            values = self.stamp_task_update(values)
+            
+            # Counters need the old status/priority, which RETURNING cannot give
+            counted = 'status' in values or 'priority' in values
+            if counted and previous is None:
+                previous = self._get_task_state(task_id, user_id)
+                if previous is None:
+                    return None
+            
+            task = self.db.session.execute(
+                self.owned_task_update_statement(task_id, user_id, values)
+            ).scalar_one_or_none()
+            if task is None:
+                self.db.session.rollback()
+                return None
+            
+            self._record_task_change(
+                user_id, self.transition_deltas(previous, task) if counted else {},
+                deadlines=counted or 'due_date' in values
+            )
+            
+            # Detach so the commit does not expire the RETURNING values and
+            # force a reload when the caller serializes the task
+            self.db.session.expunge(task)
+            self.db.session.commit()
+            self.invalidate_task_stats(user_id)
+            self.publish_task_event(user_id, 'task.updated', lambda: {'task': task.to_dict()})
+            logger.info("Task updated successfully: %s", task.title)
+            return task
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error updating task: %s", e)
+            raise e
+    
+    @staticmethod
+    def stamp_task_update(values):
+        """Add updated_at, and completed_at when the status changes, to update values"""
+        now = datetime.utcnow()
+        values = dict(values, updated_at=now)
+        if 'status' in values:
+            values['completed_at'] = now if values['status'] == 'completed' else None
+        return values
+    
+    @staticmethod
+    def owned_task_update_statement(task_id, user_id, values):
+        """UPDATE ... RETURNING for a task, matching only if user_id owns it"""
+        return (
+            update(Task)
+            .where(Task.id == task_id, Task.user_id == user_id)
+            .values(values)
+            .returning(Task)
+        )
+    
+    @staticmethod
+    def transition_deltas(previous, current):
+        """Counter deltas for a task moving between status/priority states"""
+        deltas = Counter(UserTaskCounter.deltas(previous.status, previous.priority, -1))
+        deltas.update(UserTaskCounter.deltas(current.status, current.priority, 1))
+        return deltas
+    
+    # Bulk task operations
+    @staticmethod
+    def parse_due_date(value):
+        """Parse an ISO 8601 due date into a naive UTC datetime; raises ValueError"""
+        if not value:
+            return None
+        if not isinstance(value, str):
+            raise ValueError("Invalid due date format")
+        due_date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if due_date.tzinfo:
+            due_date = due_date.astimezone(timezone.utc).replace(tzinfo=None)
+        return due_date
+    
+    @staticmethod
+    def validate_task_data(data, partial=False):
+        """Validate a task payload; returns (values, error) with exactly one set.
+        
+        With partial=True only the fields present are checked, as for updates.
+        """
+        if not isinstance(data, dict):
+            return None, 'Task data must be an object'
+        
+        values = {}
+        if not partial or 'title' in data:
+            title = data.get('title')
+            if not title or not isinstance(title, str):
+                return None, 'Title is required'
+            if len(title) > 200:
+                return None, 'Title must be at most 200 characters'
+            values['title'] = title
+        if 'description' in data:
+            values['description'] = data['description']
+        if not partial or 'priority' in data:
+            priority = data.get('priority') or 'medium'
+            if priority not in Task.PRIORITIES:
+                return None, f'Invalid priority: {priority}'
+            values['priority'] = priority
+        if 'status' in data:
+            if data['status'] not in Task.STATUSES:
+                return None, f"Invalid status: {data['status']}"
+            values['status'] = data['status']
+        if 'due_date' in data:
+            try:
+                values['due_date'] = DatabaseHandler.parse_due_date(data['due_date'])
+            except ValueError:
+                return None, 'Invalid due date format'
+        
+        return values, None
+    
+    @staticmethod
+    def _task_row(user_id, values, now):
+        """Build a complete tasks row from validated values for Core inserts"""
+        status = values.get('status', 'pending')
+        return {
+            'title': values['title'],
+            'description': values.get('description'),
+            'status': status,
+            'priority': values['priority'],
+            'due_date': values.get('due_date'),
+            'user_id': user_id,
+            'created_at': now,
+            'updated_at': now,
+            'completed_at': now if status == 'completed' else None
+        }
+    
+    @retry_on_lock
+    def bulk_create_tasks(self, user_id, items):
+        """Validate and insert many tasks in one statement and one commit.
+        
+        Returns (created_ids, errors) where errors lists the rejected items by index.
+        """
+        now = datetime.utcnow()
+        rows, errors = [], []
+        deltas = Counter()
+        
+        for index, item in enumerate(items):
+            values, error = self.validate_task_data(item)
+            if error:
+                errors.append({'index': index, 'error': error})
+                continue
+            
+            row = self._task_row(user_id, values, now)
+            rows.append(row)
+            deltas.update(UserTaskCounter.deltas(row['status'], row['priority'], 1))
+        
+        if not rows:
+            return [], errors
+        
+        try:
+            result = self.db.session.execute(
+                insert(Task).returning(Task.id, sort_by_parameter_order=True), rows
+            )
+            created_ids = list(result.scalars())
+            self._record_task_change(user_id, deltas, deadlines=any(row['due_date'] for row in rows))
+            self.db.session.commit()
+            self.invalidate_task_stats(user_id)
+            self.publish_task_event(user_id, 'tasks.created', {'ids': created_ids})
+            logger.info("Bulk created %s tasks for user %s", len(created_ids), user_id)
+            return created_ids, errors
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error bulk creating tasks: %s", e)
+            raise e
+    
+    @retry_on_lock
+    def bulk_update_tasks(self, user_id, items):
+        """Apply many partial updates to a user's tasks in one commit.
+        
+        Each item carries the task 'id' plus the fields to change. Returns
+        (updated_ids, errors) where errors lists the rejected items by index.
+        """
+        errors, changes = [], []
+        for index, item in enumerate(items):
+            task_id = item.get('id') if isinstance(item, dict) else None
+            if not isinstance(task_id, int):
+                errors.append({'index': index, 'error': 'Task id is required'})
+                continue
+            values, error = self.validate_task_data(item, partial=True)
+            if error:
+                errors.append({'index': index, 'id': task_id, 'error': error})
+                continue
+            changes.append((index, task_id, values))
+        
+        if not changes:
+            return [], errors
+        
+        try:
+            # One SELECT loads every targeted task the user owns
+            tasks = {
+                task.id: task
+                for task in Task.query.filter(
+                    Task.user_id == user_id,
+                    Task.id.in_({task_id for _, task_id, _ in changes})
+                )
+            }
+            
+            now = datetime.utcnow()
+            updated_ids = []
+            deltas = Counter()
+            for index, task_id, values in changes:
+                task = tasks.get(task_id)
+                if task is None:
+                    errors.append({'index': index, 'id': task_id, 'error': 'Task not found'})
+                    continue
+                
+                deltas.update(UserTaskCounter.deltas(task.status, task.priority, -1))
+                for key, value in values.items():
+                    setattr(task, key, value)
+                if 'status' in values:
+                    task.completed_at = now if values['status'] == 'completed' else None
+                task.updated_at = now
+                deltas.update(UserTaskCounter.deltas(task.status, task.priority, 1))
+                updated_ids.append(task_id)
+            
+            self.db.session.flush()
+            self._record_task_change(user_id, deltas)
+            self.db.session.commit()
+            if updated_ids:
+                self.invalidate_task_stats(user_id)
+                self.publish_task_event(user_id, 'tasks.updated', {'ids': updated_ids})
+            logger.info("Bulk updated %s tasks for user %s", len(updated_ids), user_id)
+            return updated_ids, sorted(errors, key=lambda error: error['index'])
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error bulk updating tasks: %s", e)
+            raise e
+    
+    @retry_on_lock
+    def bulk_delete_tasks(self, user_id, task_ids):
+        """Delete many of a user's tasks in one commit.
+        
+        Returns (deleted_ids, errors) where errors lists ids that were not found.
+        """
+        errors = [
+            {'id': task_id, 'error': 'Task id must be an integer'}
+            for task_id in task_ids if not isinstance(task_id, int)
+        ]
+        task_ids = [task_id for task_id in task_ids if isinstance(task_id, int)]
+        if not task_ids:
+            return [], errors
+        
+        try:
+            owned = and_(Task.user_id == user_id, Task.id.in_(set(task_ids)))
+            rows = self.db.session.execute(
+                select(Task.id, Task.status, Task.priority).where(owned)
+            ).all()
+            
+            deltas = Counter()
+            for row in rows:
+                deltas.update(UserTaskCounter.deltas(row.status, row.priority, -1))
+            
+            self.db.session.execute(Task.__table__.delete().where(owned))
+            self._record_task_deletions(user_id, [row.id for row in rows])
+            self._record_task_change(user_id, deltas)
+            self.db.session.commit()
+            
+            deleted_ids = [row.id for row in rows]
+            if deleted_ids:
+                self.invalidate_task_stats(user_id)
+                self.publish_task_event(user_id, 'tasks.deleted', {'ids': deleted_ids})
+            logger.info("Bulk deleted %s tasks for user %s", len(deleted_ids), user_id)
+            
+            found = set(deleted_ids)
+            errors += [
+                {'id': task_id, 'error': 'Task not found'}
+                for task_id in dict.fromkeys(task_ids) if task_id not in found
+            ]
+            return deleted_ids, errors
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error bulk deleting tasks: %s", e)
+            raise e
+    
+    def import_tasks(self, user_id, records, chunk_size=1000, max_errors=100):
+        """Validate (line_number, data) records and insert them in fixed-size chunks.
+        
+        Each chunk is one Core executemany INSERT and one commit, so memory stays
+        bounded by chunk_size. Returns (accepted, rejected, errors) where errors
+        holds the first max_errors rejections.
+        """
+        now = datetime.utcnow()
+        accepted, rejected, errors = 0, 0, []
+        rows, deltas = [], Counter()
+        
+        try:
+            for line_number, item in records:
+                values, error = self.validate_task_data(item)
+                if error:
+                    rejected += 1
+                    if len(errors) < max_errors:
+                        errors.append({'line': line_number, 'error': error})
+                    continue
+                
+                row = self._task_row(user_id, values, now)
+                rows.append(row)
+                deltas.update(UserTaskCounter.deltas(row['status'], row['priority'], 1))
+                
+                if len(rows) >= chunk_size:
+                    accepted += self._insert_task_chunk(user_id, rows, deltas)
+                    rows, deltas = [], Counter()
+            
+            if rows:
+                accepted += self._insert_task_chunk(user_id, rows, deltas)
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error importing tasks: %s", e)
+            raise e
+        finally:
+            if accepted:
+                self.invalidate_task_stats(user_id)
+                self.publish_task_event(user_id, 'tasks.imported', {'count': accepted})
+        
+        logger.info("Imported %s tasks for user %s (%s rejected)", accepted, user_id, rejected)
+        return accepted, rejected, errors
+    
+    @retry_on_lock
+    def _insert_task_chunk(self, user_id, rows, deltas):
+        """Insert one chunk of task rows with executemany and commit it"""
+        self.db.session.execute(Task.__table__.insert(), rows)
+        self._record_task_change(user_id, deltas, deadlines=any(row['due_date'] for row in rows))
+        self.db.session.commit()
+        return len(rows)
+    
+    # Delta sync
+    @staticmethod
+    def task_deletion_rows(user_id, task_ids, now=None):
+        """task_deletions rows recording that task_ids were deleted, for an executemany INSERT"""
+        now = now or datetime.utcnow()
+        return [{'task_id': task_id, 'user_id': user_id, 'deleted_at': now} for task_id in task_ids]
+    
+    def _record_task_deletions(self, user_id, task_ids):
+        """Write tombstones for deleted tasks inside the current transaction"""
+        if task_ids:
+            self.db.session.execute(TaskDeletion.__table__.insert(), self.task_deletion_rows(user_id, task_ids))
+    
+    @staticmethod
+    def task_changes_statement(user_id, position, limit):
+        """SELECT of (id, changed_at, deleted) for task writes and deletes after a sync position.
+        
+        Each side is an ordered, limited range scan of its (user_id, time, id)
+        index; the merged rows come back oldest first, plus one extra row to
+        detect a next page. Without a position only live tasks are listed.
+        """
+        def after(changed_at, item_id):
+            if position is None:
+                return literal(True)
+            return or_(changed_at > position[0], and_(changed_at == position[0], item_id > position[1]))
+        
+        branches = [
+            select(Task.id.label('id'), Task.updated_at.label('changed_at'), literal(False).label('deleted'))
+            .where(Task.user_id == user_id, after(Task.updated_at, Task.id))
+            .order_by(Task.updated_at, Task.id)
+            .limit(limit + 1)
+        ]
+        if position is not None:
+            branches.append(
+                select(TaskDeletion.task_id, TaskDeletion.deleted_at, literal(True))
+                .where(TaskDeletion.user_id == user_id, after(TaskDeletion.deleted_at, TaskDeletion.task_id))
+                .order_by(TaskDeletion.deleted_at, TaskDeletion.task_id)
+                .limit(limit + 1)
+            )
+        
+        changes = union_all(*[select(branch.subquery()) for branch in branches]).subquery()
+        return (
+            select(changes)
+            .order_by(changes.c.changed_at, changes.c.id, changes.c.deleted)
+            .limit(limit + 1)
+        )
+    
+    def get_task_changes(self, user_id, columns, token=None, limit=500):
+        """Tasks written and deleted since a sync token.
+        
+        Returns (rows, deleted_ids, next_token, has_more), where rows hold the
+        given Task columns of live tasks. Clients apply deleted_ids before
+        rows, since a deleted task's id can be reused. Without a token every
+        task is returned. When the last page is reached, next_token trails
+        the clock by SYNC_GRACE_SECONDS, so a write committed shortly after
+        its updated_at was stamped is still picked up, at the cost of some
+        rows being sent twice.
+        
+        Tokens also carry synced_at, the time from which deletes must still
+        be reported to the client: the end of its last completed sync, or the
+        start of a sync begun without a token. Only that time, not the page
+        position, decides expiry, so the pages of a full sync over old tasks
+        stay valid.
+        
+        Reads the primary: replica lag could move the token past rows the
+        replica has not seen yet. Raises ValueError for a malformed token and
+        SyncTokenExpiredError for one whose deletes may have been pruned.
+        """
+        now = datetime.utcnow()
+        position, synced_at = self.open_sync_token(token, now)
+        changes = self.db.session.execute(self.task_changes_statement(user_id, position, limit)).all()
+        live_ids, deleted_ids, next_token, has_more = self.split_changes(changes, limit, position, synced_at, now)
+        
+        rows = []
+        if live_ids:
+            rows = self.db.session.execute(self.changed_rows_statement(user_id, columns, live_ids)).all()
+        return rows, deleted_ids, next_token, has_more
+    
+    def open_sync_token(self, token, now):
+        """Decode a sync token into (position, synced_at), checking it has not expired"""
+        position, synced_at = self.decode_sync_token(token) if token else (None, now)
+        if synced_at < now - timedelta(days=app.config['SYNC_TOMBSTONE_DAYS']):
+            raise SyncTokenExpiredError(f"Sync token older than {app.config['SYNC_TOMBSTONE_DAYS']} days")
+        return position, synced_at
+    
+    def split_changes(self, changes, limit, position, synced_at, now):
+        """Trim the extra row of task_changes_statement; returns (live_ids, deleted_ids, next_token, has_more)"""
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        live_ids = [change.id for change in changes if not change.deleted]
+        deleted_ids = [change.id for change in changes if change.deleted]
+        
+        if has_more:
+            next_position = (changes[-1].changed_at, changes[-1].id)
+        else:
+            next_position = (now - timedelta(seconds=app.config['SYNC_GRACE_SECONDS']), 0)
+            if position is not None:
+                next_position = max(position, next_position)
+            synced_at = next_position[0]
+        
+        return live_ids, deleted_ids, self.encode_sync_token(next_position, synced_at), has_more
+    
+    @staticmethod
+    def changed_rows_statement(user_id, columns, task_ids):
+        """SELECT of the given Task columns for changed tasks, oldest change first"""
+        return (
+            select(*columns)
+            .where(Task.user_id == user_id, Task.id.in_(task_ids))
+            .order_by(Task.updated_at, Task.id)
+        )
+    
+    @retry_on_lock
+    def prune_task_deletions(self):
+        """Delete tombstones older than SYNC_TOMBSTONE_DAYS; returns how many were removed"""
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=app.config['SYNC_TOMBSTONE_DAYS'])
+            count = self.db.session.execute(
+                TaskDeletion.__table__.delete().where(TaskDeletion.deleted_at < cutoff)
+            ).rowcount
+            self.db.session.commit()
+            if count:
+                logger.info("Pruned %s task tombstones", count)
+            return count
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error pruning task tombstones: %s", e)
+            raise e
+    
+    # Task change events
+    def publish_task_event(self, user_id, event_type, data):
+        """Push a committed change to the user's open /api/events streams.
+        
+        data is a dict, or a callable building one, which is skipped when
+        nobody is listening. Failures are logged, never raised, since the
+        write has already been committed.
+        """
+        try:
+            if not self.events.wants(user_id):
+                return
+            if callable(data):
+                data = data()
+            self.events.publish(user_id, dict(data, type=event_type))
+        except Exception as e:
+            logger.error("Error publishing %s event: %s", event_type, e)
+    
+    # Materialized per-user counters
+    def _counter_source(self):
+        """SELECT computing user_task_counters rows from the tasks table"""
+        columns = [Task.user_id, func.count(Task.id)]
+        columns += [
+            func.sum(case((Task.status == status, 1), else_=0))
+            for status in UserTaskCounter.STATUSES
+        ]
+        columns += [
+            func.sum(case((Task.priority == priority, 1), else_=0))
+            for priority in UserTaskCounter.PRIORITIES
+        ]
+        names = ['user_id', 'total_tasks']
+        names += [f'{status}_tasks' for status in UserTaskCounter.STATUSES]
+        names += [f'{priority}_priority_tasks' for priority in UserTaskCounter.PRIORITIES]
+        return names, select(*columns).group_by(Task.user_id)
+    
+    def rebuild_user_counter_statements(self, user_id):
+        """DELETE and INSERT ... SELECT recomputing one user's counter row"""
+        counters = UserTaskCounter.__table__
+        names, source = self._counter_source()
+        return [
+            counters.delete().where(counters.c.user_id == user_id),
+            counters.insert().from_select(names, source.where(Task.user_id == user_id))
+        ]
+    
+    @staticmethod
+    def counter_update_statement(user_id, deltas):
+        """UPDATE applying non-zero counter deltas for a user, or None if there are none"""
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if not deltas:
+            return None
+        
+        counters = UserTaskCounter.__table__
+        return (
+            counters.update()
+            .where(counters.c.user_id == user_id)
+            .values({column: counters.c[column] + delta for column, delta in deltas.items()})
+        )
+    
+    def _rebuild_user_counters(self, user_id):
+        """Recompute one user's counter row inside the current transaction"""
+        for statement in self.rebuild_user_counter_statements(user_id):
+            self.db.session.execute(statement)
+    
+    def _adjust_task_counters(self, user_id, deltas):
+        """Apply counter deltas for a user inside the current transaction"""
+        statement = self.counter_update_statement(user_id, deltas)
+        if statement is None:
+            return
+        
+        # Users created before the counter table existed have no row yet; the
+        # tasks table already reflects the flushed change, so derive it from there
+        if self.db.session.execute(statement).rowcount == 0:
+            self._rebuild_user_counters(user_id)
+    
+    # Per-user task versions
+    @staticmethod
+    def version_bump_statement(user_id):
+        """UPDATE incrementing a user's task version"""
+        versions = UserTaskVersion.__table__
+        return versions.update().where(versions.c.user_id == user_id).values(version=versions.c.version + 1)
+    
+    @staticmethod
+    def version_insert_statement(user_id):
+        """INSERT of the first version row for a user"""
+        return UserTaskVersion.__table__.insert().values(user_id=user_id, version=1)
+    
+    def _bump_task_version(self, user_id):
+        """Increment a user's task version inside the current transaction"""
+        if self.db.session.execute(self.version_bump_statement(user_id)).rowcount == 0:
+            self.db.session.execute(self.version_insert_statement(user_id))
+    
+    def _record_task_change(self, user_id, deltas, deadlines=True):
+        """Apply counter deltas and bump the task version for a change to a user's tasks.
+        
+        Pass deadlines=False when no due date or status changed, so the
+        user's deadline summary need not be recomputed.
+        """
+        self._adjust_task_counters(user_id, deltas)
+        self._bump_task_version(user_id)
+        if deadlines:
+            for statement in self.deadline_refresh_statements([user_id], datetime.utcnow()):
+                self.db.session.execute(statement)
+    
+    @replica_read
+    def get_task_version(self, user_id):
+        """A user's task version: one primary-key lookup that changes whenever their tasks do"""
+        return self.db.session.execute(self.task_version_statement(user_id)).scalar() or 0
+    
+    @staticmethod
+    def task_version_statement(user_id):
+        """SELECT of a user's task version"""
+        return select(UserTaskVersion.version).where(UserTaskVersion.user_id == user_id)
+    
+    @staticmethod
+    def task_etag(user_id, version, path, query_string):
+        """Strong ETag for a task API response, shared by the sync and async tiers.
+        
+        Hashes the user's task version, the request path and query and the
+        current ETAG_TIME_BUCKET, so it changes with any write to the user's
+        tasks and at least once per bucket.
+        """
+        bucket = int(time.time() // app.config['ETAG_TIME_BUCKET'])
+        key = f"{user_id}:{version}:{bucket}:{path}?{query_string}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+    
+    @retry_on_lock
+    def rebuild_task_counters(self):
+        """Recompute every user's counters from the tasks table to repair drift"""
+        try:
+            counters = UserTaskCounter.__table__
+            names, source = self._counter_source()
+            self.db.session.execute(counters.delete())
+            result = self.db.session.execute(counters.insert().from_select(names, source))
+            self.db.session.commit()
+            logger.info("Task counters rebuilt for %s users", result.rowcount)
+            return result.rowcount
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error rebuilding task counters: %s", e)
+            raise e
+    
+    @retry_on_lock
+    def backfill_task_counters(self):
+        """Insert counter rows for users who have tasks but no row yet.
+        
+        Databases from before the counter table existed start with it empty,
+        and a missing row reads as zero tasks. Run at startup; existing rows
+        are left alone, so it is cheap once every user has one.
+        """
+        try:
+            counters = UserTaskCounter.__table__
+            names, source = self._counter_source()
+            missing = source.where(Task.user_id.not_in(select(counters.c.user_id)))
+            result = self.db.session.execute(counters.insert().from_select(names, missing))
+            self.db.session.commit()
+            if result.rowcount:
+                logger.info("Task counters backfilled for %s users", result.rowcount)
+            return result.rowcount
+        except IntegrityError:
+            # Another worker backfilled the same users first
+            self.db.session.rollback()
+            return 0
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error backfilling task counters: %s", e)
             raise e
     
     # Complex queries with JOIN and GROUP BY
+    @replica_read
     def get_user_task_statistics(self):
-        """Get task statistics grouped by user using JOIN and GROUP BY"""
+        """Get task statistics per user from the materialized counter table"""
         results = self.db.session.query(
             User.id,
             User.username,
             User.email,
-            func.count(Task.id).label('total_tasks'),
-            func.sum(case((Task.status == 'completed', 1), else_=0)).label('completed_tasks'),
-            func.sum(case((Task.status == 'pending', 1), else_=0)).label('pending_tasks'),
-            func.sum(case((Task.status == 'in_progress', 1), else_=0)).label('in_progress_tasks')
-        ).outerjoin(Task).group_by(User.id, User.username, User.email).all()
+            UserTaskCounter.total_tasks,
+            UserTaskCounter.completed_tasks,
+            UserTaskCounter.pending_tasks,
+            UserTaskCounter.in_progress_tasks
+        ).outerjoin(UserTaskCounter, UserTaskCounter.user_id == User.id).all()
         
         return [
             {
@@ -178,6 +1050,7 @@ class DatabaseHandler:
             for result in results
         ]
     
+    @replica_read
     def get_task_priority_statistics(self, user_id=None):
         """Get task statistics grouped by priority"""
         query = self.db.session.query(
@@ -204,53 +1077,291 @@ class DatabaseHandler:
             for result in results
         ]
     
-    def get_overdue_tasks(self, user_id=None):
-        """Get overdue tasks using complex WHERE conditions"""
-        query = Task.query.filter(
-            and_(
-                Task.due_date < datetime.utcnow(),
-                Task.status != 'completed'
+    def _deadline_filters(self, days=None):
+        """Build the overdue and due-soon criteria relative to now.
+        
+        Both include status != 'completed' so they can use the partial
+        idx_task_open_due index.
+        """
+        now = datetime.utcnow()
+        future_date = now + timedelta(days=self.DUE_SOON_DAYS if days is None else days)
+        is_open = Task.status != 'completed'
+        overdue = and_(Task.due_date < now, is_open)
+        due_soon = and_(Task.due_date <= future_date, Task.due_date >= now, is_open)
+        return overdue, due_soon
+    
+    # Deadline summaries
+    def deadline_summary_source(self, now, user_ids=None):
+        """SELECT computing user_deadline_summaries rows as of now, for every user or just user_ids.
+        
+        Only open tasks with a due date are aggregated, through the partial
+        idx_task_open_due index; users without any get a row of zeros.
+        """
+        horizon = now + timedelta(days=self.DUE_SOON_DAYS)
+        open_due = (
+            select(
+                Task.user_id,
+                func.sum(case((Task.due_date < now, 1), else_=0)).label('overdue_count'),
+                func.sum(case((and_(Task.due_date >= now, Task.due_date <= horizon), 1), else_=0)).label('due_soon_count'),
+                func.min(case((Task.due_date >= now, Task.due_date))).label('next_overdue_at'),
+                func.min(case((Task.due_date > horizon, Task.due_date))).label('next_due_soon_at')
             )
+            .where(Task.status != 'completed', Task.due_date.isnot(None))
+            .group_by(Task.user_id)
         )
+        users = select(User.id)
+        if user_ids is not None:
+            open_due = open_due.where(Task.user_id.in_(user_ids))
+            users = users.where(User.id.in_(user_ids))
+        open_due, users = open_due.subquery(), users.subquery()
+        
+        return (
+            select(
+                users.c.id.label('user_id'),
+                func.coalesce(open_due.c.overdue_count, 0).label('overdue_count'),
+                func.coalesce(open_due.c.due_soon_count, 0).label('due_soon_count'),
+                open_due.c.next_overdue_at,
+                open_due.c.next_due_soon_at,
+                literal(now, Task.due_date.type).label('refreshed_at')
+            )
+            .select_from(users.outerjoin(open_due, open_due.c.user_id == users.c.id))
+        )
+    
+    def deadline_refresh_statements(self, user_ids, now):
+        """DELETE and INSERT ... SELECT recomputing the deadline summaries of user_ids"""
+        summaries = UserDeadlineSummary.__table__
+        names = ['user_id', 'overdue_count', 'due_soon_count', 'next_overdue_at', 'next_due_soon_at', 'refreshed_at']
+        return [
+            summaries.delete().where(summaries.c.user_id.in_(user_ids)),
+            summaries.insert().from_select(names, self.deadline_summary_source(now, user_ids))
+        ]
+    
+    @staticmethod
+    def deadline_summary_statement(user_id):
+        """SELECT of a user's stored deadline summary"""
+        return select(
+            UserDeadlineSummary.overdue_count,
+            UserDeadlineSummary.due_soon_count,
+            UserDeadlineSummary.next_overdue_at,
+            UserDeadlineSummary.next_due_soon_at
+        ).where(UserDeadlineSummary.user_id == user_id)
+    
+    def current_deadline_summary(self, row, now):
+        """The counts of a stored summary row, or None if it is missing or the clock has moved past it"""
+        if row is None or not UserDeadlineSummary.is_current(row, now, timedelta(days=self.DUE_SOON_DAYS)):
+            return None
+        return {'overdue_count': row.overdue_count, 'due_soon_count': row.due_soon_count}
+    
+    @staticmethod
+    def deadline_counts(row):
+        """Counts from a deadline_summary_source row (None for a missing user)"""
+        if row is None:
+            return {'overdue_count': 0, 'due_soon_count': 0}
+        return {'overdue_count': int(row.overdue_count), 'due_soon_count': int(row.due_soon_count)}
+    
+    @replica_read
+    def get_deadline_summary(self, user_id):
+        """A user's overdue and due-soon counts: one primary-key lookup while the summary is current.
+        
+        A summary the clock has outdated is recomputed from the open-task
+        index for this read only; writing it back is left to the sweeper, so
+        reads never write.
+        """
+        now = datetime.utcnow()
+        counts = self.current_deadline_summary(
+            self.db.session.execute(self.deadline_summary_statement(user_id)).first(), now
+        )
+        if counts is None:
+            counts = self.deadline_counts(
+                self.db.session.execute(self.deadline_summary_source(now, [user_id])).first()
+            )
+        return counts
+    
+    @retry_on_lock
+    def sweep_deadline_summaries(self, batch_size=500):
+        """Refresh summaries the clock has outdated and create missing ones; returns users refreshed"""
+        try:
+            now = datetime.utcnow()
+            horizon = now + timedelta(days=self.DUE_SOON_DAYS)
+            summaries = UserDeadlineSummary
+            outdated = select(summaries.user_id).where(
+                or_(summaries.next_overdue_at < now, summaries.next_due_soon_at <= horizon)
+            )
+            missing = select(User.id).where(~exists().where(summaries.user_id == User.id))
+            user_ids = list(self.db.session.scalars(union_all(outdated, missing)))
+            if not user_ids:
+                self.db.session.rollback()
+                return 0
+            
+            for start in range(0, len(user_ids), batch_size):
+                for statement in self.deadline_refresh_statements(user_ids[start:start + batch_size], now):
+                    self.db.session.execute(statement)
+                self.db.session.commit()
+            
+            logger.info("Deadline summaries refreshed for %s users", len(user_ids))
+            return len(user_ids)
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error sweeping deadline summaries: %s", e)
+            raise e
+    
+    @replica_read
+    def get_task_counts(self, user_id):
+        """Get a user's status, priority, overdue and due-soon counts (cached)"""
+        counts = self.cached_task_counts(user_id)
+        if counts is None:
+            counts = self._query_task_counts(user_id)
+            self.cache_task_counts(user_id, counts)
+        return counts
+    
+    def cached_task_counts(self, user_id):
+        """Return a user's cached counts, or None on a miss"""
+        return self.stats_cache.get(f"task_stats:{user_id}")
+    
+    def cache_task_counts(self, user_id, counts):
+        """Store a user's counts until they expire or their tasks change"""
+        self.stats_cache.set(f"task_stats:{user_id}", counts)
+    
+    def invalidate_task_stats(self, user_id):
+        """Drop cached statistics after a user's tasks change"""
+        self.stats_cache.delete(f"task_stats:{user_id}")
+    
+    def _query_task_counts(self, user_id):
+        """Compute the counts behind get_task_counts from the tasks table and deadline summary"""
+        counts = self.summarize_task_counts(self.db.session.execute(self.task_counts_statement(user_id)).all())
+        counts.update(self.get_deadline_summary(user_id))
+        return counts
+    
+    @staticmethod
+    def task_counts_statement(user_id):
+        """SELECT of a user's per-priority status counts"""
+        # One pass grouped by priority yields the per-priority breakdown; the
+        # overall counters are the sums of those groups.
+        return select(
+            Task.priority,
+            func.count(Task.id).label('count'),
+            func.sum(case((Task.status == 'completed', 1), else_=0)).label('completed'),
+            func.sum(case((Task.status == 'pending', 1), else_=0)).label('pending'),
+            func.sum(case((Task.status == 'in_progress', 1), else_=0)).label('in_progress')
+        ).where(Task.user_id == user_id).group_by(Task.priority)
+    
+    @staticmethod
+    def summarize_task_counts(results):
+        """Shape task_counts_statement rows into the get_task_counts dict, less the deadline counts"""
+        priority_stats = [
+            {
+                'priority': result.priority,
+                'count': int(result.count),
+                'completed': int(result.completed or 0),
+                'pending': int(result.pending or 0),
+                'in_progress': int(result.in_progress or 0)
+            }
+            for result in results
+        ]
+        total_tasks = sum(stat['count'] for stat in priority_stats)
+        completed_tasks = sum(stat['completed'] for stat in priority_stats)
+        
+        return {
+            'user_stats': {
+                'total': total_tasks,
+                'completed': completed_tasks,
+                'pending': total_tasks - completed_tasks,
+                'in_progress': sum(stat['in_progress'] for stat in priority_stats)
+            },
+            'priority_stats': priority_stats
+        }
+    
+    @replica_read
+    def get_dashboard_snapshot(self, user_id, recent_limit=5, alert_limit=3):
+        """Get every dashboard figure for a user: cached counts plus one list query"""
+        snapshot = dict(
+            self.get_task_counts(user_id),
+            recent_tasks=[],
+            overdue_tasks=[],
+            due_soon_tasks=[]
+        )
+        
+        if not snapshot['user_stats']['total'] or not (recent_limit or alert_limit):
+            return snapshot
+        
+        overdue, due_soon = self._deadline_filters()
+        
+        # The three top-N lists come back from a single UNION ALL of LIMITed
+        # subqueries, tagged with the list they belong to.
+        def top_n(kind, criterion, order_by, limit):
+            query = select(Task.id, literal(kind).label('kind')).where(Task.user_id == user_id)
+            if criterion is not None:
+                query = query.where(criterion)
+            return select(query.order_by(*order_by).limit(limit).subquery())
+        
+        queries = [top_n('recent_tasks', None, (Task.created_at.desc(), Task.id.desc()), recent_limit)]
+        if snapshot['overdue_count']:
+            queries.append(top_n('overdue_tasks', overdue, (Task.due_date, Task.id), alert_limit))
+        if snapshot['due_soon_count']:
+            queries.append(top_n('due_soon_tasks', due_soon, (Task.due_date, Task.id), alert_limit))
+        lists = union_all(*queries).subquery()
+        
+        for task, kind in self.db.session.query(Task, lists.c.kind).join(lists, Task.id == lists.c.id):
+            snapshot[kind].append(task)
+        
+        snapshot['recent_tasks'].sort(key=lambda task: (task.created_at, task.id), reverse=True)
+        snapshot['overdue_tasks'].sort(key=lambda task: (task.due_date, task.id))
+        snapshot['due_soon_tasks'].sort(key=lambda task: (task.due_date, task.id))
+        
+        return snapshot
+    
+    @replica_read
+    def get_overdue_tasks(self, user_id=None):
+        """Get overdue tasks using complex WHERE conditions"""
+        overdue, _ = self._deadline_filters()
+        query = Task.query.filter(overdue)
         
         if user_id:
             query = query.filter(Task.user_id == user_id)
         
-        return query.join(User).order_by(Task.due_date).all()
+        return query.join(User).options(contains_eager(Task.user)).order_by(Task.due_date).all()
     
+    @replica_read
     def get_tasks_due_soon(self, days=7, user_id=None):
         """Get tasks due within specified days"""
-        future_date = datetime.utcnow() + timedelta(days=days)
-        
-        query = Task.query.filter(
-            and_(
-                Task.due_date <= future_date,
-                Task.due_date >= datetime.utcnow(),
-                Task.status != 'completed'
-            )
-        )
+        _, due_soon = self._deadline_filters(days)
+        query = Task.query.filter(due_soon)
         
         if user_id:
             query = query.filter(Task.user_id == user_id)
         
-        return query.join(User).order_by(Task.due_date).all()
+        return query.join(User).options(contains_eager(Task.user)).order_by(Task.due_date).all()
     
-    def search_tasks(self, search_term, user_id=None):
-        """Search tasks by title or description"""
-        search_pattern = f"%{search_term}%"
-        
-        query = Task.query.filter(
-            or_(
-                Task.title.ilike(search_pattern),
-                Task.description.ilike(search_pattern)
-            )
-        )
+    @replica_read
+    def search_tasks(self, search_term, user_id=None, limit=None, offset=0):
+        """Search tasks by title or description, ranked by relevance"""
+        query = task_search_index.query(search_term)
+        if query is None:
+            return []
         
         if user_id:
             query = query.filter(Task.user_id == user_id)
+        if offset:
+            query = query.offset(offset)
+        if limit:
+            query = query.limit(limit)
+        
+        # Callers that show the owner would otherwise load each user separately
+        return query.options(joinedload(Task.user)).all()
+    
+    @replica_read
+    def search_tasks_page(self, search_term, user_id, limit=50, offset=0):
+        """Get one page of search results; returns (tasks, next_offset).
         
-        return query.join(User).order_by(Task.updated_at.desc()).all()
+        Results are ordered by relevance, which has no keyset to resume
+        from, so pages are addressed by offset instead of a cursor.
+        """
+        tasks = self.search_tasks(search_term, user_id, limit=limit + 1, offset=offset)
+        if len(tasks) > limit:
+            return tasks[:limit], offset + limit
+        return tasks, None
     
+    @replica_read
     def get_recent_activity(self, user_id=None, limit=10):
         """Get recent task activity (created or updated)"""
         query = Task.query
@@ -258,4 +1369,4 @@ class DatabaseHandler:
         if user_id:
             query = query.filter(Task.user_id == user_id)
         
-        return query.join(User).order_by(Task.updated_at.desc()).limit(limit).all()
+        return query.join(User).options(contains_eager(Task.user)).order_by(Task.updated_at.desc()).limit(limit).all()
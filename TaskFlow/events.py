@@ -0,0 +1,221 @@
+import itertools
+import json
+import logging
+import queue
+import threading
+from .app import app
+
+logger = logging.getLogger(__name__)
+
+# Channel prefix for per-user task events on a shared pub/sub server
+CHANNEL_PREFIX = 'taskflow:events:'
+
+
+class Subscription:
+    """One open event stream's bounded queue of (event_id, event) pairs.
+
+    A stream that falls behind loses events rather than holding up writers;
+    it is flagged as overflowed so the client can be told to resync.
+    """
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next (event_id, event), or None if nothing arrived within timeout seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """Interface for brokers carrying per-user task change events"""
+
+    def publish(self, user_id, event):
+        """Send a JSON-serializable event to every open stream of user_id"""
+        raise NotImplementedError
+
+    def wants(self, user_id):
+        """Whether anyone may be listening for user_id, so building the event is worthwhile"""
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        """Open a Subscription to user_id's events"""
+        raise NotImplementedError
+
+    def unsubscribe(self, user_id, subscription):
+        """Close a Subscription returned by subscribe"""
+        raise NotImplementedError
+
+
+class LocalBroker(EventBroker):
+    """In-process pub/sub.
+
+    Only writes made by this process reach its streams, so multi-worker
+    deployments should use a shared backend.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = {}  # user_id -> set of Subscription
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        if subscriptions:
+            item = (next(self._ids), event)
+            for subscription in subscriptions:
+                subscription.put(item)
+
+    def wants(self, user_id):
+        return user_id in self._subscriptions
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[user_id]
+
+
+class SharedBroker(EventBroker):
+    """Pub/sub across processes through a server such as Redis.
+
+    Each process holds one pattern subscription, read by a background
+    thread that fans messages out to its local streams. The client only
+    needs publish/pubsub, so LocalPubSubClient can stand in for a real
+    server in tests and local development.
+    """
+
+    def __init__(self, client, queue_size=100):
+        self.client = client
+        self.local = LocalBroker(queue_size)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        self.client.publish(f'{CHANNEL_PREFIX}{user_id}', json.dumps(event))
+
+    def wants(self, user_id):
+        # Streams may be open in other processes
+        return True
+
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return self.local.subscribe(user_id)
+
+    def unsubscribe(self, user_id, subscription):
+        self.local.unsubscribe(user_id, subscription)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='event-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        pubsub = self.client.pubsub()
+        pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+        while True:
+            try:
+                message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message['type'] != 'pmessage':
+                    continue
+                channel = message['channel']
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                self.local.publish(int(channel[len(CHANNEL_PREFIX):]), json.loads(message['data']))
+            except Exception as e:
+                logger.error("Event listener error: %s", e)
+
+
+class LocalPubSubClient:
+    """In-memory stand-in for the subset of the Redis pub/sub API we use"""
+
+    def __init__(self):
+        self._pubsubs = []
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            pubsubs = list(self._pubsubs)
+        for pubsub in pubsubs:
+            pubsub.deliver(channel, message)
+        return len(pubsubs)
+
+    def pubsub(self):
+        pubsub = LocalPubSub()
+        with self._lock:
+            self._pubsubs.append(pubsub)
+        return pubsub
+
+
+class LocalPubSub:
+    """Pattern subscription of a LocalPubSubClient (prefix* patterns only)"""
+
+    def __init__(self):
+        self._prefixes = []
+        self._messages = queue.Queue()
+
+    def psubscribe(self, pattern):
+        self._prefixes.append(pattern.rstrip('*'))
+
+    def deliver(self, channel, message):
+        for prefix in self._prefixes:
+            if channel.startswith(prefix):
+                self._messages.put({'type': 'pmessage', 'pattern': prefix + '*', 'channel': channel, 'data': message})
+                return
+
+    def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return self._messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def create_event_broker(config):
+    """Build the event broker described by the app config"""
+    url = config.get('EVENTS_URL')
+    queue_size = config.get('EVENTS_QUEUE_SIZE', 100)
+
+    if not url:
+        return LocalBroker(queue_size)
+
+    if url == 'memory://':
+        return SharedBroker(LocalPubSubClient(), queue_size)
+
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("EVENTS_URL points at Redis but the 'redis' package is not installed") from e
+        logger.info("Using Redis task events")
+        return SharedBroker(redis.Redis.from_url(url), queue_size)
+
+    raise ValueError(f"Unsupported EVENTS_URL: {url}")
+
+
+def format_event(event_type, data, event_id=None):
+    """One Server-Sent Events message; control messages carry no id"""
+    message = f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+    return f"id: {event_id}\n{message}" if event_id is not None else message
+
+
+event_broker = create_event_broker(app.config)
@@ -0,0 +1,325 @@
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, and_
+from .app import app, db
+from .models import Job
+from .database_handler import DatabaseHandler, retry_on_lock
+from .serializers import ImportErrors, read_import_records
+
+logger = logging.getLogger(__name__)
+
+# Job functions by kind, with the attempts each kind allows by default
+_handlers = {}
+
+
+def job_handler(kind, max_attempts=None):
+    """Register a function(payload) -> JSON-serializable result as a job kind.
+
+    Kinds that are not safe to run twice should pass max_attempts=1.
+    """
+    def register(func):
+        _handlers[kind] = (func, max_attempts)
+        return func
+    return register
+
+
+class JobQueue:
+    """Enqueue, claim and settle rows of the jobs table.
+
+    A claim is a single UPDATE of the oldest ready row. On PostgreSQL the row
+    is picked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers
+    never wait on each other; SQLite has no row locks, but the UPDATE runs
+    under its database write lock and re-checks status='queued', which gives
+    the same one-claimer guarantee.
+    """
+
+    def __init__(self, config):
+        self.db = db
+        self.max_attempts = config['JOB_MAX_ATTEMPTS']
+        self.retry_delay = config['JOB_RETRY_DELAY']
+        self.retry_max_delay = config['JOB_RETRY_MAX_DELAY']
+        self.lock_timeout = config['JOB_LOCK_TIMEOUT']
+
+    @retry_on_lock
+    def enqueue(self, kind, payload=None, user_id=None, delay=0, max_attempts=None):
+        """Add a job to run after delay seconds; returns the Job"""
+        if kind not in _handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if max_attempts is None:
+            max_attempts = _handlers[kind][1] or self.max_attempts
+
+        try:
+            now = datetime.utcnow()
+            job = Job(
+                kind=kind,
+                payload=json.dumps(payload or {}),
+                user_id=user_id,
+                max_attempts=max_attempts,
+                run_at=now + timedelta(seconds=delay),
+                created_at=now,
+                updated_at=now
+            )
+            self.db.session.add(job)
+            self.db.session.commit()
+            logger.info("Job %s enqueued: %s", job.id, kind)
+            return job
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error enqueueing job: %s", e)
+            raise e
+
+    @staticmethod
+    def claim_statement(worker_id, now):
+        """UPDATE ... RETURNING that marks the oldest ready job as running for worker_id"""
+        next_job = (
+            select(Job.id)
+            .where(Job.status == 'queued', Job.run_at <= now)
+            .order_by(Job.run_at, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        return (
+            update(Job)
+            .where(Job.id == next_job, Job.status == 'queued')
+            .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1, updated_at=now)
+            .returning(Job)
+            .execution_options(synchronize_session=False)
+        )
+
+    @retry_on_lock
+    def claim(self, worker_id):
+        """Claim the next ready job for worker_id; returns the detached Job or None"""
+        try:
+            now = datetime.utcnow()
+            # A plain read first, so idle workers do not take the write lock
+            ready = self.db.session.execute(
+                select(Job.id).where(Job.status == 'queued', Job.run_at <= now).limit(1)
+            ).first()
+            if ready is None:
+                self.db.session.rollback()
+                return None
+
+            job = self.db.session.execute(self.claim_statement(worker_id, now)).scalar_one_or_none()
+            if job is None:
+                self.db.session.rollback()
+                return None
+            self.db.session.expunge(job)
+            self.db.session.commit()
+            return job
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error claiming job: %s", e)
+            raise e
+
+    def backoff(self, attempts):
+        """Seconds before retry number attempts: jittered exponential, capped"""
+        delay = min(self.retry_delay * 2 ** (attempts - 1), self.retry_max_delay)
+        return delay * random.uniform(0.5, 1.5)
+
+    @retry_on_lock
+    def _settle(self, job, values):
+        """Apply values to a running job, if the worker that claimed it still holds it"""
+        try:
+            now = datetime.utcnow()
+            held = and_(Job.id == job.id, Job.status == 'running', Job.locked_by == job.locked_by)
+            result = self.db.session.execute(
+                update(Job).where(held).values(dict(values, updated_at=now))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.session.commit()
+            if result.rowcount == 0:
+                logger.warning("Job %s was requeued while %s ran it; result discarded", job.id, job.locked_by)
+            return result.rowcount == 1
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error settling job %s: %s", job.id, e)
+            raise e
+
+    def complete(self, job, result=None):
+        """Record a job's result"""
+        return self._settle(job, {
+            'status': 'succeeded',
+            'result': json.dumps(result),
+            'error': None,
+            'locked_by': None,
+            'finished_at': datetime.utcnow()
+        })
+
+    def fail(self, job, error):
+        """Schedule a retry with backoff, or mark the job failed after its last attempt"""
+        if job.attempts < job.max_attempts:
+            return self._settle(job, {
+                'status': 'queued',
+                'error': error,
+                'locked_by': None,
+                'run_at': datetime.utcnow() + timedelta(seconds=self.backoff(job.attempts))
+            })
+        return self._settle(job, {
+            'status': 'failed',
+            'error': error,
+            'locked_by': None,
+            'finished_at': datetime.utcnow()
+        })
+
+    def execute(self, job):
+        """Run a claimed job's function and settle it"""
+        func = _handlers.get(job.kind, (None, None))[0]
+        try:
+            if func is None:
+                raise LookupError(f"No handler for job kind: {job.kind}")
+            result = func(json.loads(job.payload))
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Job %s (%s) failed on attempt %s of %s: %s", job.id, job.kind, job.attempts, job.max_attempts, e)
+            return self.fail(job, str(e))
+
+        logger.info("Job %s (%s) succeeded on attempt %s", job.id, job.kind, job.attempts)
+        return self.complete(job, result)
+
+    @retry_on_lock
+    def requeue_stale(self):
+        """Requeue (or fail) running jobs claimed more than lock_timeout ago, i.e. whose worker died"""
+        try:
+            now = datetime.utcnow()
+            stale = and_(Job.status == 'running', Job.locked_at < now - timedelta(seconds=self.lock_timeout))
+            retried = self.db.session.execute(
+                update(Job).where(stale, Job.attempts < Job.max_attempts)
+                .values(status='queued', locked_by=None, error='Worker lost', run_at=now, updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            failed = self.db.session.execute(
+                update(Job).where(stale)
+                .values(status='failed', locked_by=None, error='Worker lost', finished_at=now, updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            self.db.session.commit()
+            if retried or failed:
+                logger.warning("Recovered stale jobs: %s requeued, %s failed", retried, failed)
+            return retried + failed
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error("Error requeueing stale jobs: %s", e)
+            raise e
+
+    def get_job_for_user(self, job_id, user_id):
+        """Get a job by ID only if it belongs to the given user"""
+        return Job.query.filter_by(id=job_id, user_id=user_id).first()
+
+    def get_jobs_for_user(self, user_id, limit=20):
+        """Get a user's most recent jobs"""
+        return (
+            Job.query.filter_by(user_id=user_id)
+            .order_by(Job.created_at.desc(), Job.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+
+class WorkerPool:
+    """Threads that claim and run jobs until stopped.
+
+    Each job runs in its own app context, so it gets a fresh session.
+    """
+
+    def __init__(self, queue, concurrency, poll_interval):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads = []
+        self._periodic = []  # [interval, func, next_run]
+        self.every(max(queue.lock_timeout / 4, poll_interval), queue.requeue_stale)
+
+    def every(self, interval, func):
+        """Also run func (in an app context) every interval seconds while the pool runs"""
+        self._periodic.append([interval, func, time.monotonic() + interval])
+
+    def start(self):
+        for index in range(self.concurrency):
+            worker_id = f"{self.name}:{index}:{uuid.uuid4().hex[:8]}"
+            thread = threading.Thread(target=self._work, args=(worker_id,), name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Started %s job workers on %s", self.concurrency, self.name)
+
+    def stop(self, *args):
+        """Let running jobs finish and stop claiming new ones"""
+        self._stop.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def run_forever(self):
+        """Run until SIGINT/SIGTERM, running periodic tasks such as the stale job sweep"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.start()
+        while not self._stop.wait(self.poll_interval):
+            for task in self._periodic:
+                interval, func, next_run = task
+                if time.monotonic() < next_run:
+                    continue
+                task[2] = time.monotonic() + interval
+                with app.app_context():
+                    try:
+                        func()
+                    except Exception as e:
+                        logger.error("Periodic task %s failed: %s", func.__name__, e)
+        self.join()
+        logger.info("Job workers stopped")
+
+    def _work(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    job = self.queue.claim(worker_id)
+                    if job is not None:
+                        self.queue.execute(job)
+            except Exception as e:
+                job = None
+                logger.error("Job worker %s error: %s", worker_id, e)
+            if job is None:
+                self._stop.wait(self.poll_interval)
+
+
+job_queue = JobQueue(app.config)
+
+
+def spool_path(name):
+    """Path for a file handed to a job through JOB_SPOOL_DIR"""
+    os.makedirs(app.config['JOB_SPOOL_DIR'], exist_ok=True)
+    return os.path.join(app.config['JOB_SPOOL_DIR'], name)
+
+
+# Job kinds. Imports commit chunk by chunk, so a retry would duplicate the
+# chunks already written; they get a single attempt.
+@job_handler('import_tasks', max_attempts=1)
+def import_tasks_job(payload):
+    """Import a spooled CSV/NDJSON upload for a user"""
+    path = payload['path']
+    try:
+        parse_errors = ImportErrors()
+        with open(path, 'rb') as upload:
+            records = read_import_records(upload, payload['format'], parse_errors)
+            accepted, rejected, errors = DatabaseHandler().import_tasks(payload['user_id'], records)
+        return parse_errors.summary(accepted, rejected, errors)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@job_handler('rebuild_task_counters')
+def rebuild_task_counters_job(payload):
+    """Recompute user_task_counters from the tasks table"""
+    return {'users': DatabaseHandler().rebuild_task_counters()}
@@ -0,0 +1,231 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from flask import request, g
+
+# Id of the request being served on this thread/context, stamped on its records
+_request_id = ContextVar('taskflow_request_id', default=None)
+
+# Argument types that can be formatted on the listener thread unchanged;
+# anything else (ORM objects, mutable containers) is formatted by the caller
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None))
+
+# Attributes every LogRecord has, so JsonFormatter can find the extra= fields
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+# Header carrying the request id in and out
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+def current_request_id():
+    """The id of the request in progress, or None outside a request"""
+    return _request_id.get()
+
+
+def parse_levels(value):
+    """Parse "logger=LEVEL,..." into {logger: level}; raises ValueError"""
+    levels = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, level = item.partition('=')
+        level = level.strip().upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Unknown log level for {name.strip()}: {level}")
+        levels[name.strip()] = level
+    return levels
+
+
+def parse_sample_rates(value):
+    """Parse "logger=rate,..." into {logger: rate between 0 and 1}; raises ValueError"""
+    rates = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition('=')
+        rate = float(rate)
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Log sample rate for {name.strip()} must be between 0 and 1")
+        rates[name.strip()] = rate
+    return rates
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the id of the request that logged it"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO-and-below records from high-volume loggers.
+
+    Rates apply to a logger and its children; warnings and errors are never
+    dropped.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return None
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        rate = self._rate(record.name)
+        return rate is None or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves %-formatting to the listener thread.
+
+    The stock handler formats every record before queueing it; here only
+    tracebacks and non-primitive arguments are rendered in the caller. A full
+    queue drops the record rather than blocking the request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        if record.args and not all(isinstance(arg, _IMMUTABLE_ARGS) for arg in (
+            record.args.values() if isinstance(record.args, dict) else record.args
+        )):
+            record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+
+
+def configure_logging(config):
+    """Route all logging through a queue to a background writer thread.
+
+    Callers only pay for level checks, sampling and a queue put; formatting
+    and I/O happen on the listener thread. Safe to call again (e.g. in tests);
+    the previous listener is stopped first.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(sys.stderr)
+    if config['LOG_FORMAT'] == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'))
+
+    handler = LazyQueueHandler(queue.Queue(config['LOG_QUEUE_SIZE']))
+    rates = parse_sample_rates(config['LOG_SAMPLE_RATES'])
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(config['LOG_LEVEL'].upper())
+    for name, level in parse_levels(config['LOG_LEVELS']).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return handler
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def bind_request_id(incoming=None):
+    """Set the request id, reusing a proxy's X-Request-ID if sane; returns the token"""
+    # Accept ids from a proxy, but only short printable ones
+    request_id = incoming if incoming and len(incoming) <= 64 and incoming.isprintable() else uuid.uuid4().hex
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    """Restore the request id that bind_request_id replaced"""
+    try:
+        _request_id.reset(token)
+    except ValueError:
+        # Reset from another context (e.g. by an async server); just clear it
+        _request_id.set(None)
+
+
+def _start_request_id():
+    g.request_id_token = bind_request_id(request.headers.get(REQUEST_ID_HEADER))
+
+
+def _send_request_id(response):
+    request_id = _request_id.get()
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def _clear_request_id(exc):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        reset_request_id(token)
+
+
+def install_request_ids(app):
+    """Give every request an id, echoed in X-Request-ID and on its log records"""
+    app.before_request(_start_request_id)
+    app.after_request(_send_request_id)
+    app.teardown_request(_clear_request_id)
+
+
+atexit.register(stop_logging)
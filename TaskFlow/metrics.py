@@ -0,0 +1,225 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+from flask import request, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.wsgi import ClosingIterator
+from .app import app
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Accounting for the request being served on this thread/context
+_current_request = ContextVar('taskflow_request_stats', default=None)
+
+# Start times of templates currently rendering on this thread
+_render_starts = threading.local()
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """Per-process request, database and template metrics.
+
+    Each gunicorn worker keeps its own registry, so scrape every worker
+    (or run a single worker) for complete numbers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency = {}   # (endpoint, method) -> Histogram
+        self.requests = {}          # (endpoint, method, status) -> count
+        self.db_queries = {}        # endpoint -> statements executed
+        self.db_time = {}           # endpoint -> seconds spent in the database
+        self.template_render = {}   # template -> Histogram
+        self.untimed = set()        # endpoints whose responses are long-lived streams
+
+    def skip_latency(self, endpoint):
+        """Leave an endpoint out of the latency histogram, e.g. one holding a stream open for minutes"""
+        self.untimed.add(endpoint)
+
+    def record_request(self, endpoint, method, status, duration, queries, db_time):
+        with self._lock:
+            if endpoint not in self.untimed:
+                self.request_latency.setdefault((endpoint, method), Histogram()).observe(duration)
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.db_queries[endpoint] = self.db_queries.get(endpoint, 0) + queries
+            self.db_time[endpoint] = self.db_time.get(endpoint, 0.0) + db_time
+
+    def record_template(self, template, duration):
+        with self._lock:
+            self.template_render.setdefault(template, Histogram()).observe(duration)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            self._render_histograms(
+                lines, 'taskflow_request_duration_seconds', 'Request latency by endpoint',
+                {_labels(endpoint=e, method=m): h for (e, m), h in self.request_latency.items()}
+            )
+            lines.append('# HELP taskflow_requests_total Requests served by endpoint and status')
+            lines.append('# TYPE taskflow_requests_total counter')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'taskflow_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+            lines.append('# HELP taskflow_db_queries_total SQL statements executed by endpoint')
+            lines.append('# TYPE taskflow_db_queries_total counter')
+            for endpoint, count in sorted(self.db_queries.items()):
+                lines.append(f'taskflow_db_queries_total{_labels(endpoint=endpoint)} {count}')
+            lines.append('# HELP taskflow_db_time_seconds_total Time spent executing SQL by endpoint')
+            lines.append('# TYPE taskflow_db_time_seconds_total counter')
+            for endpoint, seconds in sorted(self.db_time.items()):
+                lines.append(f'taskflow_db_time_seconds_total{_labels(endpoint=endpoint)} {seconds:.6f}')
+            self._render_histograms(
+                lines, 'taskflow_template_render_seconds', 'Template render time',
+                {_labels(template=t): h for t, h in self.template_render.items()}
+            )
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, histograms):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, histogram in sorted(histograms.items()):
+            base = labels[:-1] + ',' if labels != '{}' else '{'
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'{name}_bucket{base}le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{base}le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{labels} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{labels} {histogram.count}')
+
+
+class MetricsMiddleware:
+    """WSGI middleware timing each request and, if enabled, profiling on ?profile=1"""
+
+    def __init__(self, wsgi_app, registry, profiling=False):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+        self.profiling = profiling
+
+    def __call__(self, environ, start_response):
+        if self.profiling and parse_qs(environ.get('QUERY_STRING', '')).get('profile') == ['1']:
+            return self._profile(environ, start_response)
+
+        stats = {'endpoint': '<unmatched>', 'queries': 0, 'db_time': 0.0, 'status': '000'}
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+
+        def capture_status(status, headers, exc_info=None):
+            stats['status'] = status.split(' ', 1)[0]
+            return start_response(status, headers, exc_info)
+
+        def finish():
+            # Runs once the body has been sent, so streamed responses count in full
+            self.registry.record_request(
+                stats['endpoint'], environ.get('REQUEST_METHOD', 'GET'), stats['status'],
+                time.perf_counter() - start, stats['queries'], stats['db_time']
+            )
+            try:
+                _current_request.reset(token)
+            except ValueError:
+                # Closed from another context (e.g. by an async server); nothing to restore
+                pass
+
+        try:
+            response = self.wsgi_app(environ, capture_status)
+        except Exception:
+            finish()
+            raise
+        return ClosingIterator(response, [finish])
+
+    def _profile(self, environ, start_response):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.wsgi_app(environ, lambda status, headers, exc_info=None: (lambda data: None))
+            try:
+                for _ in response:
+                    pass
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+        finally:
+            profiler.disable()
+
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(60)
+        start_response('200 OK', [('Content-Type', 'text/plain; charset=utf-8')])
+        return [output.getvalue().encode('utf-8')]
+
+
+metrics = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault('taskflow_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    starts = conn.info.get('taskflow_query_start')
+    if stats is not None and starts:
+        stats['queries'] += 1
+        stats['db_time'] += time.perf_counter() - starts.pop()
+
+
+def _record_endpoint():
+    stats = _current_request.get()
+    if stats is not None:
+        stats['endpoint'] = request.endpoint or '<unmatched>'
+
+
+def _template_started(sender, template, context, **extra):
+    if not hasattr(_render_starts, 'stack'):
+        _render_starts.stack = []
+    _render_starts.stack.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    stack = getattr(_render_starts, 'stack', None)
+    if stack:
+        metrics.record_template(template.name or '<string>', time.perf_counter() - stack.pop())
+
+
+def install_metrics(app):
+    """Hook request timing, SQL accounting and template timing into the app"""
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_record_endpoint)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics, profiling=app.config['PROFILING_ENABLED'])
+
+
+if app.config['METRICS_ENABLED']:
+    install_metrics(app)
@@ -1,7 +1,8 @@
+import json
 from datetime import datetime
 from types import SimpleNamespace
 from .app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from . import passwords
 from flask_login import UserMixin
 from sqlalchemy import func, case # Make sure func and case are imported here
 
@@ -27,11 +28,15 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.password_hasher.hash(password)
     
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        return passwords.password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Check if the stored hash predates the current hashing policy"""
+        return passwords.password_hasher.needs_rehash(self.password_hash)
     
     def get_task_stats(self):
         """
@@ -55,6 +60,12 @@ class User(UserMixin, db.Model):
             pending=total_tasks - completed_tasks
         )
     
+    @property
+    def task_count(self):
+        """Number of tasks owned, read from the counter row instead of loading every task"""
+        counters = db.session.get(UserTaskCounter, self.id)
+        return counters.total_tasks if counters else 0
+    
     def to_dict(self):
         """Convert user to dictionary for JSON serialization"""
         return {
@@ -62,7 +73,7 @@ class User(UserMixin, db.Model):
             'username': self.username,
             'email': self.email,
             'created_at': self.created_at.isoformat(),
-            'task_count': len(self.tasks)
+            'task_count': self.task_count
         }
     
     def __repr__(self):
@@ -72,6 +83,9 @@ class Task(db.Model):
     """Task model representing user tasks"""
     __tablename__ = 'tasks'
     
+    STATUSES = ('pending', 'in_progress', 'completed')
+    PRIORITIES = ('low', 'medium', 'high')
+    
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -151,7 +165,145 @@ class Task(db.Model):
     def __repr__(self):
         return f'<Task {self.title}>'
 
+class UserTaskCounter(db.Model):
+    """Per-user task totals maintained incrementally by DatabaseHandler"""
+    __tablename__ = 'user_task_counters'
+    
+    STATUSES = Task.STATUSES
+    PRIORITIES = Task.PRIORITIES
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    pending_tasks = db.Column(db.Integer, nullable=False, default=0)
+    in_progress_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completed_tasks = db.Column(db.Integer, nullable=False, default=0)
+    low_priority_tasks = db.Column(db.Integer, nullable=False, default=0)
+    medium_priority_tasks = db.Column(db.Integer, nullable=False, default=0)
+    high_priority_tasks = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def deltas(cls, status, priority, sign):
+        """Map counter columns to the change caused by adding (+1) or removing (-1) a task"""
+        deltas = {'total_tasks': sign}
+        if status in cls.STATUSES:
+            deltas[f'{status}_tasks'] = sign
+        if priority in cls.PRIORITIES:
+            deltas[f'{priority}_priority_tasks'] = sign
+        return deltas
+    
+    def __repr__(self):
+        return f'<UserTaskCounter {self.user_id}>'
+
+class UserTaskVersion(db.Model):
+    """Per-user version bumped by every change to the user's tasks, used for HTTP ETags"""
+    __tablename__ = 'user_task_versions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<UserTaskVersion {self.user_id}: {self.version}>'
+
+class UserDeadlineSummary(db.Model):
+    """Per-user overdue/due-soon counts, refreshed by task writes and the deadline sweeper.
+    
+    The counts only change with the clock when an open task's due date
+    passes (next_overdue_at) or enters the due-soon window (next_due_soon_at);
+    until then a row stays current without being recomputed.
+    """
+    __tablename__ = 'user_deadline_summaries'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    overdue_count = db.Column(db.Integer, nullable=False, default=0)
+    due_soon_count = db.Column(db.Integer, nullable=False, default=0)
+    next_overdue_at = db.Column(db.DateTime)  # earliest open due date not yet passed
+    next_due_soon_at = db.Column(db.DateTime)  # earliest open due date beyond the due-soon window
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+    
+    @staticmethod
+    def is_current(row, now, window):
+        """Whether a summary row's counts still hold at now, for a due-soon window timedelta"""
+        return (
+            (row.next_overdue_at is None or now <= row.next_overdue_at)
+            and (row.next_due_soon_at is None or now + window < row.next_due_soon_at)
+        )
+    
+    def __repr__(self):
+        return f'<UserDeadlineSummary {self.user_id}: {self.overdue_count} overdue, {self.due_soon_count} due soon>'
+
+class TaskDeletion(db.Model):
+    """Tombstone of a deleted task, so delta sync clients learn about deletes.
+    
+    Rows older than SYNC_TOMBSTONE_DAYS are pruned; sync tokens older than
+    that are refused and the client must sync from scratch.
+    """
+    __tablename__ = 'task_deletions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TaskDeletion {self.task_id}>'
+
+class Job(db.Model):
+    """Deferred unit of work run by the worker process (see jobs.py)"""
+    __tablename__ = 'jobs'
+    
+    STATUSES = ('queued', 'running', 'succeeded', 'failed')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=1)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Convert job to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat(),
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind}: {self.status}>'
+
 # Create indexes for better query performance
 db.Index('idx_task_user_status', Task.user_id, Task.status)
 db.Index('idx_task_user_priority', Task.user_id, Task.priority)
 db.Index('idx_task_due_date', Task.due_date)
+db.Index('idx_task_user_created', Task.user_id, Task.created_at, Task.id)
+db.Index('idx_task_user_updated', Task.user_id, Task.updated_at, Task.id)
+# Open tasks only, so deadline queries skip users' completed backlogs
+db.Index('idx_task_open_due', Task.user_id, Task.due_date,
+         sqlite_where=Task.status != 'completed', postgresql_where=Task.status != 'completed')
+db.Index('idx_deadline_next_overdue', UserDeadlineSummary.next_overdue_at)
+db.Index('idx_deadline_next_due_soon', UserDeadlineSummary.next_due_soon_at)
+db.Index('idx_task_deletion_user_deleted', TaskDeletion.user_id, TaskDeletion.deleted_at, TaskDeletion.task_id)
+db.Index('idx_job_status_run_at', Job.status, Job.run_at)
+db.Index('idx_job_user_created', Job.user_id, Job.created_at)
+
+
+# Every model is defined now; build the schema (see app.init_database)
+from .app import init_database  # noqa: E402
+init_database()
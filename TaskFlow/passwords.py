@@ -0,0 +1,123 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+from .app import app
+
+try:
+    import bcrypt
+except ImportError:  # bcrypt is optional unless selected
+    bcrypt = None
+
+logger = logging.getLogger(__name__)
+
+# Default cost per algorithm: bcrypt log2 rounds, scrypt N, pbkdf2 iterations
+DEFAULT_COSTS = {
+    'bcrypt': 12,
+    'scrypt': 32768,
+    'pbkdf2': 1_000_000,
+}
+
+# bcrypt only looks at the first 72 bytes of a password
+BCRYPT_MAX_BYTES = 72
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool is saturated and cannot take more work"""
+    pass
+
+
+class PasswordPolicy:
+    """Hashing algorithm and cost used for new password hashes"""
+
+    def __init__(self, algorithm='scrypt', cost=None):
+        if algorithm not in DEFAULT_COSTS:
+            raise ValueError(f"Unsupported password hash algorithm: {algorithm}")
+        if algorithm == 'bcrypt' and bcrypt is None:
+            raise RuntimeError("PASSWORD_HASH_ALGORITHM is bcrypt but the 'bcrypt' package is not installed")
+        self.algorithm = algorithm
+        self.cost = int(cost or DEFAULT_COSTS[algorithm])
+
+    @property
+    def method(self):
+        """The werkzeug method string, or the bcrypt hash prefix, for this policy"""
+        if self.algorithm == 'bcrypt':
+            return f'$2b${self.cost:02d}$'
+        if self.algorithm == 'scrypt':
+            return f'scrypt:{self.cost}:8:1'
+        return f'pbkdf2:sha256:{self.cost}'
+
+    def hash(self, password):
+        """Hash a password with this policy (CPU bound; see PasswordHasher)"""
+        if self.algorithm == 'bcrypt':
+            salt = bcrypt.gensalt(rounds=self.cost)
+            return bcrypt.hashpw(password.encode()[:BCRYPT_MAX_BYTES], salt).decode()
+        return generate_password_hash(password, method=self.method)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with a different algorithm or cost"""
+        if self.algorithm == 'bcrypt':
+            return not password_hash.startswith(self.method)
+        return password_hash.split('$', 1)[0] != self.method
+
+    def __repr__(self):
+        return f'<PasswordPolicy {self.method}>'
+
+
+def verify_password_hash(password_hash, password):
+    """Check a password against a bcrypt or werkzeug hash (CPU bound)"""
+    if password_hash.startswith('$2'):
+        if bcrypt is None:
+            logger.error("Stored bcrypt hash but the 'bcrypt' package is not installed")
+            return False
+        return bcrypt.checkpw(password.encode()[:BCRYPT_MAX_BYTES], password_hash.encode())
+    return check_password_hash(password_hash, password)
+
+
+class PasswordHasher:
+    """Runs hashing and verification on a small bounded thread pool.
+
+    bcrypt, scrypt and pbkdf2 all release the GIL, so the pool caps how many
+    cores password work can occupy per process; once workers plus queue slots
+    are taken, callers get PasswordHashingBusy instead of piling up.
+    """
+
+    def __init__(self, policy, workers=2, queue_size=16, timeout=10):
+        self.policy = policy
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHashingBusy("Password hashing pool is saturated")
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError as e:
+            raise PasswordHashingBusy("Password hashing timed out") from e
+
+    def hash(self, password):
+        """Hash a password with the configured policy"""
+        return self._run(self.policy.hash, password)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        return self._run(verify_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash should be upgraded to the configured policy"""
+        return self.policy.needs_rehash(password_hash)
+
+
+password_hasher = PasswordHasher(
+    PasswordPolicy(app.config['PASSWORD_HASH_ALGORITHM'], app.config['PASSWORD_HASH_COST']),
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE'],
+    timeout=app.config['PASSWORD_HASH_TIMEOUT']
+)
@@ -0,0 +1,166 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .app import app
+
+logger = logging.getLogger(__name__)
+
+# Statements recorded for the request (or audit_queries block) in progress
+_current_audit = ContextVar('taskflow_query_audit', default=None)
+
+# Longest statement text included in log messages
+MAX_LOGGED_STATEMENT = 500
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request or audited block runs more statements than allowed"""
+    pass
+
+
+class QueryAudit:
+    """Statements executed during one request or audit_queries() block"""
+
+    def __init__(self, label):
+        self.label = label
+        self.statements = Counter()
+        self.count = 0
+
+    def record(self, statement):
+        self.count += 1
+        self.statements[statement] += 1
+
+    def repeated(self, threshold):
+        """Statements run at least threshold times, i.e. likely N+1 loops"""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+def _shorten(statement):
+    statement = ' '.join(statement.split())
+    if len(statement) > MAX_LOGGED_STATEMENT:
+        return statement[:MAX_LOGGED_STATEMENT] + '...'
+    return statement
+
+
+def _explain(conn, cursor, statement, parameters):
+    """Return the database's plan for a SELECT, run on the same DBAPI connection"""
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return '<not a query>'
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            # SQLite rows are (id, parent, notused, detail); PostgreSQL returns one column
+            return '\n'.join(str(row[-1]) for row in explain_cursor.fetchall())
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return f'<EXPLAIN failed: {e}>'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_audit.get() is not None:
+        conn.info.setdefault('taskflow_audit_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    audit = _current_audit.get()
+    starts = conn.info.get('taskflow_audit_start')
+    if audit is None or not starts:
+        return
+
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    audit.record(statement)
+
+    if elapsed_ms >= app.config['QUERY_AUDIT_SLOW_MS'] and not executemany:
+        plan = _explain(conn, cursor, statement, parameters)
+        logger.warning("Slow query (%.1f ms) in %s: %s\nPlan:\n%s", elapsed_ms, audit.label, _shorten(statement), plan)
+
+
+def _listen():
+    """Attach the cursor event hooks once per process"""
+    if not event.contains(Engine, 'after_cursor_execute', _after_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _report(audit, budget=None):
+    """Log repeated statements and enforce the statement budget for an audit"""
+    for statement, count in audit.repeated(app.config['QUERY_AUDIT_REPEAT_THRESHOLD']):
+        logger.warning("Possible N+1 in %s: statement ran %s times: %s", audit.label, count, _shorten(statement))
+
+    logger.debug("%s ran %s SQL statements", audit.label, audit.count)
+
+    if budget is not None and audit.count > budget:
+        message = f"{audit.label} ran {audit.count} SQL statements, budget is {budget}"
+        if app.config['QUERY_AUDIT_RAISE']:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def query_budget(limit):
+    """Declare the most SQL statements a view may run per request.
+
+    Place it below @app.route; other decorators built with functools.wraps
+    carry the budget through to the registered view.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+@contextmanager
+def audit_queries(label='audited block', budget=None):
+    """Count the statements run inside the block and enforce an optional budget.
+
+    Usable outside a request, e.g. around a DatabaseHandler call in a test:
+
+        with audit_queries('dashboard snapshot', budget=2) as audit:
+            db_handler.get_dashboard_snapshot(user_id)
+    """
+    _listen()
+    audit = QueryAudit(label)
+    token = _current_audit.set(audit)
+    try:
+        yield audit
+    finally:
+        _current_audit.reset(token)
+    _report(audit, budget)
+
+
+def _start_request_audit():
+    _current_audit.set(QueryAudit(f"{request.method} {request.endpoint or request.path}"))
+
+
+def _finish_request_audit(response):
+    # Streamed bodies run after this point, so only their setup queries count
+    audit = _current_audit.get()
+    if audit is None:
+        return response
+    _current_audit.set(None)
+    view = app.view_functions.get(request.endpoint)
+    _report(audit, getattr(view, 'query_budget', None))
+    return response
+
+
+def _clear_request_audit(exc):
+    _current_audit.set(None)
+
+
+def install_query_audit(app):
+    """Count, inspect and budget the SQL statements run by each request"""
+    _listen()
+    app.before_request(_start_request_audit)
+    app.after_request(_finish_request_audit)
+    app.teardown_request(_clear_request_audit)
+    logger.info("Query auditing enabled (slow query threshold %s ms)", app.config['QUERY_AUDIT_SLOW_MS'])
+
+
+if app.config['QUERY_AUDIT_ENABLED']:
+    install_query_audit(app)
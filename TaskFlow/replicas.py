@@ -0,0 +1,140 @@
+import functools
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from flask import request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Bind keys given to replica engines in SQLALCHEMY_BINDS
+REPLICA_BIND_PREFIX = 'replica_'
+
+# Cheap query that also fails if the replica is missing the schema
+HEALTH_CHECK_QUERY = 'SELECT 1 FROM tasks LIMIT 1'
+
+# Whether reads may be served by a replica: decided per request, or by
+# replica_read outside requests (None means not decided yet)
+_replica_reads = ContextVar('taskflow_replica_reads', default=None)
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for the configured replica URLs"""
+    return {f'{REPLICA_BIND_PREFIX}{index}': url for index, url in enumerate(urls)}
+
+
+def replica_read(method):
+    """Let a read-only DatabaseHandler method run on a replica.
+
+    Inside a request the request's routing decision wins, so a client kept
+    on the primary after a write is not sent back to a replica. The session
+    also falls back to the primary once it has written anything.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _replica_reads.get() is not None:
+            return method(*args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Round-robin choice of a healthy read replica engine"""
+
+    def __init__(self):
+        self.db = None
+        self.bind_keys = []
+        self.health_interval = 10
+        self.sticky_seconds = 5
+        self._cycle = None
+        self._lock = threading.Lock()
+        self._health = {}  # bind key -> (checked_at, healthy)
+
+    def init_app(self, app, db):
+        self.db = db
+        self.bind_keys = sorted(key for key in app.config.get('SQLALCHEMY_BINDS', {})
+                                if key.startswith(REPLICA_BIND_PREFIX))
+        if not self.bind_keys:
+            return
+
+        self.health_interval = app.config['REPLICA_HEALTH_INTERVAL']
+        self.sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+        self._cycle = itertools.cycle(self.bind_keys)
+        app.before_request(self._route_request)
+        app.after_request(self._remember_writes)
+        app.teardown_request(self._reset_request)
+        logger.info("Routing reads to %s replica(s)", len(self.bind_keys))
+
+    def choose(self):
+        """Return the next healthy replica engine, or None to use the primary"""
+        if not self.bind_keys:
+            return None
+        for _ in self.bind_keys:
+            with self._lock:
+                key = next(self._cycle)
+            if self._is_healthy(key):
+                return self.db.engines[key]
+        return None
+
+    def _is_healthy(self, key):
+        checked_at, healthy = self._health.get(key, (0.0, True))
+        now = time.monotonic()
+        if now - checked_at < self.health_interval:
+            return healthy
+
+        try:
+            with self.db.engines[key].connect() as conn:
+                conn.execute(text(HEALTH_CHECK_QUERY))
+            now_healthy = True
+        except Exception as e:
+            logger.error("Replica %s failed its health check: %s", key, e)
+            now_healthy = False
+
+        if now_healthy != healthy:
+            logger.info("Replica %s is %s rotation", key, 'back in' if now_healthy else 'out of')
+        self._health[key] = (now, now_healthy)
+        return now_healthy
+
+    def _route_request(self):
+        # GETs read from replicas unless this client wrote very recently
+        _replica_reads.set(request.method in ('GET', 'HEAD') and session.get('_primary_until', 0) <= time.time())
+
+    def _remember_writes(self, response):
+        # Keep the client on the primary briefly so a redirect after a write
+        # does not land on a replica that has not caught up yet
+        if self.db.session.info.get('primary_pinned'):
+            session['_primary_until'] = time.time() + self.sticky_seconds
+        return response
+
+    def _reset_request(self, exc):
+        _replica_reads.set(None)
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Session sending reads to a replica when allowed, and everything else to the primary.
+
+    Any flush or DML statement pins the session to the primary for the rest
+    of its life (one request, with Flask-SQLAlchemy's scoped session).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['primary_pinned'] = True
+            elif _replica_reads.get() and not self.info.get('primary_pinned'):
+                # Stay on one replica per session so reads are mutually consistent
+                if 'replica' not in self.info:
+                    self.info['replica'] = replica_router.choose()
+                if self.info['replica'] is not None:
+                    return self.info['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -1,17 +1,71 @@
-from flask import render_template, request, redirect, url_for, flash, jsonify, session
+from flask import render_template, request, redirect, url_for, flash, jsonify, session, Response, stream_with_context
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime
+from functools import wraps
+import csv
+import hashlib
+import hmac
+import io
+import json
 import logging
+import time
+import uuid
 
 from .app import app
-from .database_handler import DatabaseHandler
+from .database_handler import DatabaseHandler, DuplicateUserError, SyncTokenExpiredError
 from .auth import AuthHandler
+from .passwords import PasswordHashingBusy
+from .metrics import metrics
+from .query_audit import query_budget
+from .serializers import TASK_FIELDS, TaskRowSerializer, ImportErrors, parse_fields, json_response, read_import_records
+from .jobs import job_queue, spool_path
+from .events import event_broker, format_event
 from .models import User, Task
 
+logger = logging.getLogger(__name__)
+
 # Initialize handlers
 db_handler = DatabaseHandler()
 auth_handler = AuthHandler()
 
+# Page sizes for keyset-paginated task listings
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Largest batch accepted by the bulk task endpoints
+MAX_BULK_ITEMS = 1000
+
+# Columns written by the task export, in Task.to_dict() key order
+EXPORT_FIELDS = list(TASK_FIELDS)
+EXPORT_CHUNK_ROWS = 500
+
+# How long EventSource clients wait before reconnecting to /api/events
+EVENTS_RETRY_MS = 3000
+
+def conditional_on_task_version(view):
+    """Answer If-None-Match with 304 before running a view over the user's tasks.
+    
+    The ETag comes from DatabaseHandler.task_etag, so a matching poll costs
+    one primary-key lookup. Place it below @login_required.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = db_handler.get_task_version(current_user.id)
+        etag = db_handler.task_etag(
+            current_user.id, version, request.path, request.query_string.decode('latin-1')
+        )
+        
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
 @app.route('/')
 def index():
     if current_user.is_authenticated:
@@ -41,8 +95,14 @@ def register():
             flash('Registration successful! Please log in.', 'success')
             return redirect(url_for('login'))
         
+        except DuplicateUserError as e:
+            flash(str(e), 'danger')
+            return render_template('register.html')
+        except PasswordHashingBusy:
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
+            return render_template('register.html'), 503
         except Exception as e:
-            logging.error(f"Registration error: {str(e)}")
+            logger.error("Registration error: %s", e)
             flash('Registration failed. Please try again.', 'danger')
     
     return render_template('register.html')
@@ -57,7 +117,11 @@ def login():
         password = request.form.get('password')
         remember_me = bool(request.form.get('remember_me'))
         
-        user = auth_handler.authenticate_user(username, password)
+        try:
+            user = auth_handler.authenticate_user(username, password)
+        except PasswordHashingBusy:
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
+            return render_template('login.html'), 503
         
         if user:
             login_user(user, remember=remember_me)
@@ -81,35 +145,52 @@ def logout():
     return redirect(url_for('index'))
 
 @app.route('/dashboard')
+@query_budget(4)
 @login_required
 def dashboard():
-    user_stats = current_user.get_task_stats()
-    recent_tasks = db_handler.get_tasks_by_user(current_user.id)[:5]
-    overdue_tasks = db_handler.get_overdue_tasks(current_user.id)
-    due_soon_tasks = db_handler.get_tasks_due_soon(7, current_user.id)
-    priority_stats = db_handler.get_task_priority_statistics(current_user.id)
+    snapshot = db_handler.get_dashboard_snapshot(current_user.id)
     
     return render_template('dashboard.html',
-                         user_stats=user_stats,
-                         recent_tasks=recent_tasks,
-                         overdue_tasks=overdue_tasks,
-                         due_soon_tasks=due_soon_tasks,
-                         priority_stats=priority_stats)
+                         user_stats=snapshot['user_stats'],
+                         recent_tasks=snapshot['recent_tasks'],
+                         overdue_tasks=snapshot['overdue_tasks'],
+                         due_soon_tasks=snapshot['due_soon_tasks'],
+                         overdue_count=snapshot['overdue_count'],
+                         due_soon_count=snapshot['due_soon_count'],
+                         priority_stats=snapshot['priority_stats'])
 
 @app.route('/tasks')
+@query_budget(2)
 @login_required
 def tasks():
     status_filter = request.args.get('status')
     priority_filter = request.args.get('priority')
     search_term = request.args.get('search')
+    cursor = request.args.get('cursor')
+    next_cursor = None
+    next_offset = None
     
     if search_term:
-        user_tasks = db_handler.search_tasks(search_term, current_user.id)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        user_tasks, next_offset = db_handler.search_tasks_page(
+            search_term, current_user.id, limit=DEFAULT_PAGE_SIZE, offset=offset
+        )
     else:
-        user_tasks = db_handler.get_tasks_by_user(current_user.id, status_filter, priority_filter)
+        try:
+            user_tasks, next_cursor = db_handler.get_tasks_page(
+                current_user.id, status_filter, priority_filter,
+                limit=DEFAULT_PAGE_SIZE, cursor=cursor
+            )
+        except ValueError:
+            flash('Invalid page requested, showing the first page instead', 'warning')
+            user_tasks, next_cursor = db_handler.get_tasks_page(
+                current_user.id, status_filter, priority_filter, limit=DEFAULT_PAGE_SIZE
+            )
     
     return render_template('tasks.html', 
                          tasks=user_tasks,
+                         next_cursor=next_cursor,
+                         next_offset=next_offset,
                          current_status=status_filter,
                          current_priority=priority_filter,
                          search_term=search_term)
@@ -143,7 +224,7 @@ def create_task():
             flash('Task created successfully!', 'success')
             return redirect(url_for('tasks'))
         except Exception as e:
-            logging.error(f"Error creating task: {str(e)}")
+            logger.error("Error creating task: %s", e)
             flash('Failed to create task. Please try again.', 'danger')
     
     return render_template('create_task.html')
@@ -151,12 +232,6 @@ def create_task():
 @app.route('/tasks/<int:task_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_task(task_id):
-    task = db_handler.get_task_by_id(task_id)
-    
-    if not task or task.user_id != current_user.id:
-        flash('Task not found or access denied', 'danger')
-        return redirect(url_for('tasks'))
-    
     if request.method == 'POST':
         title = request.form.get('title')
         description = request.form.get('description')
@@ -164,53 +239,56 @@ def edit_task(task_id):
         priority = request.form.get('priority')
         due_date_str = request.form.get('due_date')
         
+        error = None
         if not title:
-            flash('Task title is required', 'danger')
-            return render_template('edit_task.html', task=task)
+            error = 'Task title is required'
         
         # *** FIX: Handle empty date string ***
         due_date = None
-        if due_date_str:
+        if due_date_str and not error:
             try:
                 due_date = datetime.strptime(due_date_str, '%Y-%m-%d')
             except ValueError:
-                flash('Invalid due date format', 'danger')
-                return render_template('edit_task.html', task=task)
+                error = 'Invalid due date format'
         
-        try:
-            updated_task = db_handler.update_task(
-                task_id=task_id, title=title, description=description,
-                status=status, priority=priority, due_date=due_date
-            )
-            
-            if updated_task:
-                flash('Task updated successfully!', 'success')
+        if error:
+            flash(error, 'danger')
+        else:
+            try:
+                # The ownership check happens inside the UPDATE statement
+                updated_task = db_handler.update_task_for_user(
+                    task_id, current_user.id, title=title, description=description,
+                    status=status, priority=priority, due_date=due_date
+                )
+                
+                if updated_task:
+                    flash('Task updated successfully!', 'success')
+                else:
+                    flash('Task not found or access denied', 'danger')
                 return redirect(url_for('tasks'))
-            else:
-                flash('Failed to update task', 'danger')
-        
-        except Exception as e:
-            logging.error(f"Error updating task: {str(e)}")
-            flash('Failed to update task. Please try again.', 'danger')
+            
+            except Exception as e:
+                logger.error("Error updating task: %s", e)
+                flash('Failed to update task. Please try again.', 'danger')
+    
+    task = db_handler.get_task_for_user(task_id, current_user.id)
+    
+    if not task:
+        flash('Task not found or access denied', 'danger')
+        return redirect(url_for('tasks'))
     
     return render_template('edit_task.html', task=task)
 
 @app.route('/tasks/<int:task_id>/delete', methods=['POST'])
 @login_required
 def delete_task(task_id):
-    task = db_handler.get_task_by_id(task_id)
-    
-    if not task or task.user_id != current_user.id:
-        flash('Task not found or access denied', 'danger')
-        return redirect(url_for('tasks'))
-    
     try:
-        if db_handler.delete_task(task_id):
+        if db_handler.delete_task_for_user(task_id, current_user.id):
             flash('Task deleted successfully!', 'success')
         else:
-            flash('Failed to delete task', 'danger')
+            flash('Task not found or access denied', 'danger')
     except Exception as e:
-        logging.error(f"Error deleting task: {str(e)}")
+        logger.error("Error deleting task: %s", e)
         flash('Failed to delete task. Please try again.', 'danger')
     
     return redirect(url_for('tasks'))
@@ -218,57 +296,212 @@ def delete_task(task_id):
 @app.route('/tasks/<int:task_id>/toggle-status', methods=['POST'])
 @login_required
 def toggle_task_status(task_id):
-    task = db_handler.get_task_by_id(task_id)
-    
-    if not task or task.user_id != current_user.id:
-        return jsonify({'error': 'Task not found or access denied'}), 404
-    
     try:
         # *** FIX: Correctly toggle any non-completed status to completed ***
-        new_status = 'completed' if task.status != 'completed' else 'pending'
-        updated_task = db_handler.update_task(task_id, status=new_status)
-        
-        if updated_task:
-            return jsonify({
-                'success': True,
-                'new_status': new_status,
-                'message': f'Task marked as {new_status.replace("_", " ")}'
-            })
-        else:
-            return jsonify({'error': 'Failed to update task'}), 500
+        updated_task = db_handler.toggle_task_status_for_user(task_id, current_user.id)
+        
+        if not updated_task:
+            return jsonify({'error': 'Task not found or access denied'}), 404
+        
+        new_status = updated_task.status
+        return jsonify({
+            'success': True,
+            'new_status': new_status,
+            'task': updated_task.to_dict(),
+            'message': f'Task marked as {new_status.replace("_", " ")}'
+        })
     
     except Exception as e:
-        logging.error(f"Error toggling task status: {str(e)}")
+        logger.error("Error toggling task status: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
 # REST API Endpoints
 @app.route('/api/tasks', methods=['GET'])
+@query_budget(3)
 @login_required
+@conditional_on_task_version
 def api_get_tasks():
-    """REST API endpoint to get user tasks in JSON format"""
+    """REST API endpoint to get a page of user tasks in JSON format"""
     try:
-        # Get filter parameters
+        # Get filter, pagination and sparse fieldset parameters
         status_filter = request.args.get('status')
         priority_filter = request.args.get('priority')
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        try:
+            serializer = TaskRowSerializer(parse_fields(request.args.get('fields')))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Get tasks
-        tasks = db_handler.get_tasks_by_user(current_user.id, status_filter, priority_filter)
+        # Get only the needed columns as plain rows
+        try:
+            rows, next_cursor = db_handler.get_task_rows_page(
+                current_user.id, serializer.columns, status_filter, priority_filter, limit=limit, cursor=cursor
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
-        # Convert to JSON format
-        tasks_data = [task.to_dict() for task in tasks]
+        tasks_data = serializer.serialize(rows)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'tasks': tasks_data,
             'count': len(tasks_data),
+            'next_cursor': next_cursor,
             'user_id': current_user.id
         })
     
     except Exception as e:
-        logging.error(f"API error getting tasks: {str(e)}")
+        logger.error("API error getting tasks: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/tasks/changes', methods=['GET'])
+@query_budget(4)
+@login_required
+@conditional_on_task_version
+def api_get_task_changes():
+    """REST API endpoint for delta sync: tasks written and deleted since a token"""
+    try:
+        since = request.args.get('since')
+        limit = request.args.get('limit', MAX_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        try:
+            serializer = TaskRowSerializer(parse_fields(request.args.get('fields')))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            rows, deleted_ids, next_token, has_more = db_handler.get_task_changes(
+                current_user.id, serializer.columns, token=since, limit=limit
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid sync token'}), 400
+        except SyncTokenExpiredError:
+            # Tombstones this old are gone, so the client must start over
+            return jsonify({'error': 'Sync token expired', 'full_sync_required': True}), 410
+        
+        return json_response({
+            'success': True,
+            'tasks': serializer.serialize(rows),
+            'deleted': deleted_ids,
+            'next_token': next_token,
+            'has_more': has_more
+        })
+    
+    except Exception as e:
+        logger.error("API error getting task changes: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/tasks/export', methods=['GET'])
+@login_required
+def api_export_tasks():
+    """REST API endpoint streaming all user tasks as NDJSON or CSV"""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Format must be ndjson or csv'}), 400
+    
+    user_id = current_user.id
+    
+    def generate_ndjson():
+        lines = []
+        for task in db_handler.stream_tasks(user_id):
+            lines.append(json.dumps(task))
+            if len(lines) >= EXPORT_CHUNK_ROWS:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for count, task in enumerate(db_handler.stream_tasks(user_id), 1):
+            writer.writerow(task)
+            if count % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    if export_format == 'csv':
+        generate, mimetype = generate_csv, 'text/csv'
+    else:
+        generate, mimetype = generate_ndjson, 'application/x-ndjson'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=tasks.{export_format}'}
+    )
+
+@app.route('/api/tasks/import', methods=['POST'])
+@login_required
+def api_import_tasks():
+    """REST API endpoint importing tasks from an uploaded CSV or NDJSON file"""
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'A file upload named "file" is required'}), 400
+    
+    # Without ?format=, go by the file extension, if the part has a filename
+    extension = upload.filename.rsplit('.', 1)[-1].lower() if upload.filename and '.' in upload.filename else None
+    import_format = request.args.get('format') or extension
+    if import_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Format must be ndjson or csv'}), 400
+    
+    if request.args.get('mode') == 'background':
+        return _enqueue_import(upload, import_format)
+    
+    try:
+        parse_errors = ImportErrors()
+        records = read_import_records(upload.stream, import_format, parse_errors)
+        accepted, rejected, errors = db_handler.import_tasks(current_user.id, records)
+        
+        return jsonify(dict(parse_errors.summary(accepted, rejected, errors), success=True))
+    
+    except Exception as e:
+        logger.error("API error importing tasks: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _enqueue_import(upload, import_format):
+    """Spool an upload and hand it to the job worker; responds 202 with the job"""
+    try:
+        path = spool_path(f"import-{uuid.uuid4().hex}.{import_format}")
+        upload.save(path)
+        job = job_queue.enqueue('import_tasks', {
+            'user_id': current_user.id,
+            'path': path,
+            'format': import_format
+        }, user_id=current_user.id)
+        
+        response = jsonify({'success': True, 'job': job.to_dict()})
+        response.status_code = 202
+        response.headers['Location'] = url_for('api_get_job', job_id=job.id)
+        return response
+    
+    except Exception as e:
+        logger.error("API error enqueueing import: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/jobs', methods=['GET'])
+@login_required
+def api_get_jobs():
+    """REST API endpoint listing the user's recent background jobs"""
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    jobs = job_queue.get_jobs_for_user(current_user.id, limit=limit)
+    return jsonify({'success': True, 'jobs': [job.to_dict() for job in jobs]})
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def api_get_job(job_id):
+    """REST API endpoint reporting one background job's status and result"""
+    job = job_queue.get_job_for_user(job_id, current_user.id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
 @app.route('/api/tasks', methods=['POST'])
 @login_required
 def api_create_task():
@@ -279,21 +512,17 @@ def api_create_task():
         if not data or not data.get('title'):
             return jsonify({'error': 'Title is required'}), 400
         
-        # Parse due date if provided
-        due_date = None
-        if data.get('due_date'):
-            try:
-                due_date = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({'error': 'Invalid due date format'}), 400
+        values, error = db_handler.validate_task_data(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Create task
         task = db_handler.create_task(
-            title=data['title'],
-            description=data.get('description'),
+            title=values['title'],
+            description=values.get('description'),
             user_id=current_user.id,
-            priority=data.get('priority', 'medium'),
-            due_date=due_date
+            priority=values['priority'],
+            due_date=values.get('due_date')
         )
         
         return jsonify({
@@ -303,26 +532,33 @@ def api_create_task():
         }), 201
     
     except Exception as e:
-        logging.error(f"API error creating task: {str(e)}")
+        logger.error("API error creating task: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/tasks/<int:task_id>', methods=['GET'])
+@query_budget(2)
 @login_required
 def api_get_task(task_id):
     """REST API endpoint to get a specific task"""
     try:
-        task = db_handler.get_task_by_id(task_id)
+        task = db_handler.get_task_for_user(task_id, current_user.id)
         
-        if not task or task.user_id != current_user.id:
+        if not task:
             return jsonify({'error': 'Task not found'}), 404
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'task': task.to_dict()
         })
+        # updated_at has sub-second precision that Last-Modified drops, so
+        # pair it with an ETag; make_conditional prefers If-None-Match
+        response.last_modified = task.updated_at
+        response.set_etag(hashlib.sha1(f"{task.id}:{task.updated_at.isoformat()}".encode('utf-8')).hexdigest())
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
     
     except Exception as e:
-        logging.error(f"API error getting task: {str(e)}")
+        logger.error("API error getting task: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
@@ -330,36 +566,28 @@ def api_get_task(task_id):
 def api_update_task(task_id):
     """REST API endpoint to update a task"""
     try:
-        task = db_handler.get_task_by_id(task_id)
-        
-        if not task or task.user_id != current_user.id:
-            return jsonify({'error': 'Task not found'}), 404
-        
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        # Parse due date if provided
-        if 'due_date' in data and data['due_date']:
-            try:
-                data['due_date'] = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({'error': 'Invalid due date format'}), 400
+        values, error = db_handler.validate_task_data(data, partial=True)
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Update task
-        updated_task = db_handler.update_task(task_id, **data)
+        # Update task; the ownership check happens inside the UPDATE statement
+        updated_task = db_handler.update_task_for_user(task_id, current_user.id, **values)
         
-        if updated_task:
-            return jsonify({
-                'success': True,
-                'task': updated_task.to_dict(),
-                'message': 'Task updated successfully'
-            })
-        else:
-            return jsonify({'error': 'Failed to update task'}), 500
+        if not updated_task:
+            return jsonify({'error': 'Task not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'task': updated_task.to_dict(),
+            'message': 'Task updated successfully'
+        })
     
     except Exception as e:
-        logging.error(f"API error updating task: {str(e)}")
+        logger.error("API error updating task: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
@@ -367,45 +595,166 @@ def api_update_task(task_id):
 def api_delete_task(task_id):
     """REST API endpoint to delete a task"""
     try:
-        task = db_handler.get_task_by_id(task_id)
-        
-        if not task or task.user_id != current_user.id:
+        if not db_handler.delete_task_for_user(task_id, current_user.id):
             return jsonify({'error': 'Task not found'}), 404
         
-        if db_handler.delete_task(task_id):
-            return jsonify({
-                'success': True,
-                'message': 'Task deleted successfully'
-            })
-        else:
-            return jsonify({'error': 'Failed to delete task'}), 500
+        return jsonify({
+            'success': True,
+            'message': 'Task deleted successfully'
+        })
+    
+    except Exception as e:
+        logger.error("API error deleting task: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _bulk_payload(key):
+    """Read the list under key from a bulk request body, or return an error response"""
+    data = request.get_json(silent=True)
+    items = data.get(key) if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({'error': f'A non-empty "{key}" list is required'}), 400)
+    if len(items) > MAX_BULK_ITEMS:
+        return None, (jsonify({'error': f'At most {MAX_BULK_ITEMS} items per request'}), 413)
+    return items, None
+
+@app.route('/api/tasks/bulk', methods=['POST'])
+@login_required
+def api_bulk_create_tasks():
+    """REST API endpoint to create many tasks in one transaction"""
+    items, error_response = _bulk_payload('tasks')
+    if error_response:
+        return error_response
+    
+    try:
+        created_ids, errors = db_handler.bulk_create_tasks(current_user.id, items)
+        
+        return jsonify({
+            'success': True,
+            'created': created_ids,
+            'count': len(created_ids),
+            'errors': errors
+        }), 201 if created_ids else 200
+    
+    except Exception as e:
+        logger.error("API error bulk creating tasks: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/tasks/bulk', methods=['PATCH'])
+@login_required
+def api_bulk_update_tasks():
+    """REST API endpoint to update many tasks in one transaction"""
+    items, error_response = _bulk_payload('tasks')
+    if error_response:
+        return error_response
+    
+    try:
+        updated_ids, errors = db_handler.bulk_update_tasks(current_user.id, items)
+        
+        return jsonify({
+            'success': True,
+            'updated': updated_ids,
+            'count': len(updated_ids),
+            'errors': errors
+        })
     
     except Exception as e:
-        logging.error(f"API error deleting task: {str(e)}")
+        logger.error("API error bulk updating tasks: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/tasks/bulk', methods=['DELETE'])
+@login_required
+def api_bulk_delete_tasks():
+    """REST API endpoint to delete many tasks in one transaction"""
+    task_ids, error_response = _bulk_payload('ids')
+    if error_response:
+        return error_response
+    
+    try:
+        deleted_ids, errors = db_handler.bulk_delete_tasks(current_user.id, task_ids)
+        
+        return jsonify({
+            'success': True,
+            'deleted': deleted_ids,
+            'count': len(deleted_ids),
+            'errors': errors
+        })
+    
+    except Exception as e:
+        logger.error("API error bulk deleting tasks: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/statistics', methods=['GET'])
+@query_budget(4)
 @login_required
+@conditional_on_task_version
 def api_get_statistics():
     """REST API endpoint to get user statistics"""
     try:
-        user_stats = current_user.get_task_stats()
-        priority_stats = db_handler.get_task_priority_statistics(current_user.id)
-        overdue_count = len(db_handler.get_overdue_tasks(current_user.id))
-        due_soon_count = len(db_handler.get_tasks_due_soon(7, current_user.id))
+        snapshot = db_handler.get_dashboard_snapshot(current_user.id, recent_limit=0, alert_limit=0)
         
         return jsonify({
             'success': True,
-            'user_statistics': user_stats,
-            'priority_statistics': priority_stats,
-            'overdue_tasks': overdue_count,
-            'tasks_due_soon': due_soon_count
+            'user_statistics': snapshot['user_stats'],
+            'priority_statistics': snapshot['priority_stats'],
+            'overdue_tasks': snapshot['overdue_count'],
+            'tasks_due_soon': snapshot['due_soon_count']
         })
     
     except Exception as e:
-        logging.error(f"API error getting statistics: {str(e)}")
+        logger.error("API error getting statistics: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/events', methods=['GET'])
+@login_required
+def api_events():
+    """Server-Sent Events stream pushing the user's task changes as they commit"""
+    if not app.config['EVENTS_ENABLED']:
+        return jsonify({'error': 'Live events are disabled'}), 404
+    user_id = current_user.id
+    heartbeat = app.config['EVENTS_HEARTBEAT']
+    # Streams end periodically so each reconnect re-checks the login and
+    # frees the worker; EventSource reconnects on its own
+    deadline = time.monotonic() + app.config['EVENTS_MAX_STREAM_SECONDS']
+    
+    def generate():
+        subscription = event_broker.subscribe(user_id)
+        try:
+            # Events sent while the client was away are not replayed, so
+            # "ready" tells a reconnecting client to refresh what it shows
+            yield f"retry: {EVENTS_RETRY_MS}\n\n" + format_event('ready', {})
+            while time.monotonic() < deadline:
+                item = subscription.get(timeout=heartbeat)
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield format_event('resync', {})
+                if item is None:
+                    yield ': keepalive\n\n'
+                    continue
+                event_id, event = item
+                yield format_event(event['type'], event, event_id)
+        finally:
+            event_broker.unsubscribe(user_id, subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Streams stay open for minutes and would swamp the latency histogram
+metrics.skip_latency('api_events')
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint for this worker's metrics"""
+    if not app.config['METRICS_ENABLED']:
+        return render_template('404.html'), 404
+    token = app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain',
+                        headers={'WWW-Authenticate': 'Bearer'})
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
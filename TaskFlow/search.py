@@ -0,0 +1,129 @@
+import logging
+import re
+from sqlalchemy import text, table, column, literal_column, func, or_
+from sqlalchemy.exc import OperationalError
+from .app import db
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# SQLite: external-content FTS5 table over tasks, synced by triggers so every
+# write path (ORM, Core, raw SQL) keeps the index current.
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, content='tasks', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+# PostgreSQL: an expression GIN index, so no extra column has to be kept in
+# sync. Queries must use exactly the same expression for the index to apply.
+POSTGRES_TSVECTOR = "to_tsvector('english', coalesce(tasks.title, '') || ' ' || coalesce(tasks.description, ''))"
+POSTGRES_FTS_DDL = [
+    f"CREATE INDEX IF NOT EXISTS idx_task_search ON tasks USING GIN ({POSTGRES_TSVECTOR})",
+]
+
+tasks_fts = table('tasks_fts', column('rowid'))
+
+
+class TaskSearchIndex:
+    """Full-text search over task titles and descriptions"""
+
+    def __init__(self, db):
+        self.db = db
+        self.backend = None  # 'sqlite', 'postgresql' or None for the LIKE fallback
+
+    def install(self):
+        """Create the full-text index for the current database, if supported"""
+        dialect = self.db.engine.dialect.name
+
+        try:
+            if dialect == 'sqlite':
+                self._install_sqlite()
+            elif dialect == 'postgresql':
+                with self.db.engine.begin() as conn:
+                    for statement in POSTGRES_FTS_DDL:
+                        conn.execute(text(statement))
+            else:
+                logger.warning("Full-text search not supported on %s, using LIKE", dialect)
+                return
+        except OperationalError as e:
+            logger.warning("Full-text search unavailable, using LIKE: %s", e)
+            return
+
+        self.backend = dialect
+        logger.info("Full-text search index ready (%s)", dialect)
+
+    def _install_sqlite(self):
+        with self.db.engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'")
+            ).first()
+
+            for statement in SQLITE_FTS_DDL:
+                conn.execute(text(statement))
+
+            # Index tasks that were written before the FTS table existed
+            if not exists:
+                conn.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+
+    @staticmethod
+    def tokenize(search_term):
+        """Split a search term into plain word tokens, dropping query syntax"""
+        return re.findall(r'\w+', search_term or '')
+
+    @staticmethod
+    def escape_like(token):
+        """Escape LIKE wildcards so a token matches literally (\\ is the escape)"""
+        return token.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    def query(self, search_term):
+        """Build a Task query matching every word of the term, best matches first.
+
+        The last word is prefix-matched so results update while typing.
+        Ties are broken by id so the order is stable across pages.
+        Returns None when the term contains no searchable words.
+        """
+        tokens = self.tokenize(search_term)
+        if not tokens:
+            return None
+
+        if self.backend == 'sqlite':
+            match = ' '.join(f'"{token}"' for token in tokens) + '*'
+            return Task.query.join(tasks_fts, tasks_fts.c.rowid == Task.id).filter(
+                literal_column('tasks_fts').op('MATCH')(match)
+            ).order_by(func.bm25(literal_column('tasks_fts')), Task.updated_at.desc(), Task.id.desc())
+
+        if self.backend == 'postgresql':
+            document = literal_column(POSTGRES_TSVECTOR)
+            ts_query = func.to_tsquery('english', ' & '.join(tokens) + ':*')
+            return Task.query.filter(
+                document.op('@@')(ts_query)
+            ).order_by(func.ts_rank(document, ts_query).desc(), Task.updated_at.desc(), Task.id.desc())
+
+        query = Task.query
+        for token in tokens:
+            search_pattern = f"%{self.escape_like(token)}%"
+            query = query.filter(
+                or_(
+                    Task.title.ilike(search_pattern, escape='\\'),
+                    Task.description.ilike(search_pattern, escape='\\')
+                )
+            )
+        return query.order_by(Task.updated_at.desc(), Task.id.desc())
+
+
+task_search_index = TaskSearchIndex(db)
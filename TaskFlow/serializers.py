@@ -0,0 +1,160 @@
+import csv
+import json
+from datetime import datetime
+from flask import Response
+from .models import Task
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is used without it
+    orjson = None
+
+# Keys of Task.to_dict(), in order
+TASK_FIELDS = ('id', 'title', 'description', 'status', 'priority', 'due_date',
+               'created_at', 'updated_at', 'completed_at', 'user_id', 'is_overdue')
+DATETIME_FIELDS = frozenset(('due_date', 'created_at', 'updated_at', 'completed_at'))
+
+
+def parse_fields(value):
+    """Parse a comma-separated fields= parameter; None means every field.
+
+    The id is always included. Raises ValueError naming unknown fields.
+    """
+    if not value:
+        return None
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = sorted(requested.difference(TASK_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    requested.add('id')
+    return tuple(field for field in TASK_FIELDS if field in requested)
+
+
+class TaskRowSerializer:
+    """Serializes rows of selected Task columns into Task.to_dict()-shaped dicts.
+
+    Only the columns behind the requested fields (plus id and created_at,
+    which keyset paging needs) are selected, rows stay plain tuples, and
+    is_overdue is computed against a single "now" per call.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = fields or TASK_FIELDS
+
+        names = {field for field in self.fields if field != 'is_overdue'} | {'id', 'created_at'}
+        if 'is_overdue' in self.fields:
+            names |= {'due_date', 'status'}
+        self.columns = [getattr(Task, name) for name in TASK_FIELDS if name in names]
+
+        index = {column.key: position for position, column in enumerate(self.columns)}
+        self._plain = [(field, index[field]) for field in self.fields
+                       if field not in DATETIME_FIELDS and field != 'is_overdue']
+        self._dates = [(field, index[field]) for field in self.fields if field in DATETIME_FIELDS]
+        self._overdue = (index['due_date'], index['status']) if 'is_overdue' in self.fields else None
+
+    def serialize_row(self, row, now):
+        item = {field: row[position] for field, position in self._plain}
+        for field, position in self._dates:
+            value = row[position]
+            item[field] = value.isoformat() if value else None
+        if self._overdue:
+            due_date, status = row[self._overdue[0]], row[self._overdue[1]]
+            item['is_overdue'] = bool(due_date and status != 'completed' and now > due_date)
+        return item
+
+    def serialize(self, rows, now=None):
+        now = now or datetime.utcnow()
+        return [self.serialize_row(row, now) for row in rows]
+
+
+def dumps(payload):
+    """Encode a JSON payload to bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    """A JSON Response encoded with dumps() instead of jsonify"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+class ImportErrors:
+    """Rejected import lines: the first `limit` are kept, the rest only counted"""
+
+    def __init__(self, limit=100):
+        self.limit = limit
+        self.items = []
+        self.count = 0
+
+    def add(self, line_number, error):
+        self.count += 1
+        if len(self.items) < self.limit:
+            self.items.append({'line': line_number, 'error': error})
+
+    def summary(self, accepted, rejected, errors):
+        """Merge with import_tasks' (accepted, rejected, errors) into the import response body"""
+        return {
+            'accepted': accepted,
+            'rejected': rejected + self.count,
+            'errors': sorted(self.items + errors, key=lambda error: error['line'])[:self.limit]
+        }
+
+
+def _decode_lines(stream, parse_errors):
+    """Yield (line_number, text) for each UTF-8 line of a binary stream.
+
+    Lines that are not valid UTF-8 are recorded in parse_errors and skipped,
+    so one bad line cannot abort an import whose earlier chunks are already
+    committed.
+    """
+    for line_number, raw in enumerate(stream, 1):
+        try:
+            yield line_number, raw.decode('utf-8-sig' if line_number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            parse_errors.add(line_number, 'Line is not valid UTF-8')
+
+
+def _csv_records(lines):
+    """Yield (line_number, row) from decoded lines, numbering each row by its first physical line"""
+    starts = []
+
+    def track(lines):
+        for line_number, line in lines:
+            if not starts and line.strip():
+                starts.append(line_number)
+            yield line
+
+    # csv pulls exactly the lines of one record per row, so whatever was
+    # consumed since the previous row belongs to this one
+    reader = csv.DictReader(track(lines))
+    if reader.fieldnames is None:
+        return
+    starts.clear()
+    for row in reader:
+        yield starts[0], row
+        starts.clear()
+
+
+def read_import_records(stream, import_format, parse_errors):
+    """Yield (line_number, data) pairs from a binary CSV or NDJSON stream.
+
+    Line numbers are physical lines of the file. Lines that cannot be
+    decoded or parsed are recorded in parse_errors, an ImportErrors, and
+    skipped.
+    """
+    lines = _decode_lines(stream, parse_errors)
+
+    if import_format == 'csv':
+        # Header is line 1; blank cells count as missing fields
+        for line_number, row in _csv_records(lines):
+            yield line_number, {key: value for key, value in row.items() if key and value != ''}
+        return
+
+    for line_number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            parse_errors.add(line_number, 'Invalid JSON')
@@ -0,0 +1,59 @@
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def is_sqlite_file(uri):
+    """Whether a database URI points at an on-disk SQLite database"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def sqlite_engine_options(config):
+    """Engine options for a file-backed SQLite database.
+
+    Connections are local files, so pre-ping and recycling only cost time;
+    a QueuePool keeps one connection per concurrent thread open so the
+    pragmas and page cache set on connect are reused.
+    """
+    return {
+        'poolclass': QueuePool,
+        'pool_size': config['SQLITE_POOL_SIZE'],
+        'max_overflow': config['SQLITE_POOL_OVERFLOW'],
+        'connect_args': {
+            'check_same_thread': False,
+            'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+        },
+    }
+
+
+def install_sqlite_pragmas(engine, config):
+    """Apply the production pragmas to every new connection of a SQLite engine"""
+    pragmas = [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    logger.info("SQLite profile: journal_mode=%s, synchronous=%s", config['SQLITE_JOURNAL_MODE'], config['SQLITE_SYNCHRONOUS'])
+
+
+def is_lock_error(error):
+    """Whether an OperationalError means another connection held the write lock"""
+    message = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in message or 'database table is locked' in message
@@ -12,6 +12,7 @@ const App = {
     init: function () {
         this.bindEvents();
         this.initializeComponents();
+        this.events.connect();
         console.log('Task Management App initialized');
     },
 
@@ -47,6 +48,15 @@ const App = {
         deleteButtons.forEach(button => {
             button.closest('form').addEventListener('submit', this.confirmDelete);
         });
+
+        // Load more tasks in place instead of navigating to the next page
+        document.addEventListener('click', function (event) {
+            const loadMore = event.target.closest('#load-more');
+            if (loadMore) {
+                event.preventDefault();
+                App.tasks.loadMore(loadMore);
+            }
+        });
     },
 
     // Initialize components
@@ -316,10 +326,7 @@ const App = {
 
                 if (data.success) {
                     App.showAlert('success', data.message);
-                    // Reload page after a short delay
-                    setTimeout(() => {
-                        window.location.reload();
-                    }, 1000);
+                    App.tasks.applyUpdate(data.task);
                 } else {
                     App.showAlert('danger', data.error || 'Failed to update task');
                 }
@@ -331,6 +338,39 @@ const App = {
             }
         },
 
+        // Append the next page of tasks using the cursor link
+        loadMore: async function (link) {
+            App.showLoading(link);
+
+            try {
+                const response = await fetch(link.href);
+                const html = await response.text();
+                const page = new DOMParser().parseFromString(html, 'text/html');
+
+                const taskList = document.getElementById('task-list');
+                const newTasks = page.getElementById('task-list');
+                if (taskList && newTasks) {
+                    Array.from(newTasks.children).forEach(card => {
+                        card.querySelectorAll('form[action*="/delete"]').forEach(form => {
+                            form.addEventListener('submit', App.confirmDelete);
+                        });
+                        window.formatLocalDateTimes(card);
+                        taskList.appendChild(card);
+                    });
+                }
+
+                const container = document.getElementById('load-more-container');
+                const newContainer = page.getElementById('load-more-container');
+                if (container) {
+                    container.innerHTML = newContainer ? newContainer.innerHTML : '';
+                }
+            } catch (error) {
+                console.error('Error loading more tasks:', error);
+                App.showAlert('danger', 'Failed to load more tasks');
+                App.hideLoading(link);
+            }
+        },
+
         // Delete task with confirmation
         delete: async function (taskId, taskTitle) {
             const confirmMessage = `Are you sure you want to delete "${taskTitle}"? This action cannot be undone.`;
@@ -344,18 +384,127 @@ const App = {
                 App.showAlert('success', 'Task deleted successfully');
 
                 // Remove task card from DOM
-                const taskCard = document.querySelector(`[data-task-id="${taskId}"]`);
-                if (taskCard) {
-                    taskCard.style.transition = 'opacity 0.3s ease';
-                    taskCard.style.opacity = '0';
-                    setTimeout(() => {
-                        taskCard.remove();
-                    }, 300);
-                }
+                App.tasks.removeCard(taskId);
             } catch (error) {
                 console.error('Error deleting task:', error);
                 App.showAlert('danger', error.message || 'Failed to delete task');
             }
+        },
+
+        // Fade out and remove a task card, if it is on the page
+        removeCard: function (taskId) {
+            const taskCard = document.querySelector(`[data-task-id="${taskId}"]`);
+            if (taskCard) {
+                taskCard.style.transition = 'opacity 0.3s ease';
+                taskCard.style.opacity = '0';
+                setTimeout(() => {
+                    taskCard.remove();
+                }, 300);
+            }
+        },
+
+        // Redraw a task card from a task's JSON, or drop it if it no longer matches the filters
+        applyUpdate: function (task) {
+            const taskCard = document.querySelector(`[data-task-id="${task.id}"]`);
+            if (!taskCard) {
+                return;
+            }
+
+            const filters = new URLSearchParams(window.location.search);
+            if ((filters.get('status') && filters.get('status') !== task.status) ||
+                (filters.get('priority') && filters.get('priority') !== task.priority)) {
+                App.tasks.removeCard(task.id);
+                return;
+            }
+
+            const completed = task.status === 'completed';
+            const priority = taskCard.querySelector('[data-role="priority"]');
+            priority.className = `badge bg-${App.utils.getPriorityColor(task.priority)} me-2`;
+            priority.textContent = task.priority.toUpperCase();
+
+            const status = taskCard.querySelector('[data-role="status"]');
+            status.className = `badge bg-${App.utils.getStatusColor(task.status)}`;
+            status.textContent = task.status.replace('_', ' ').replace(/\b\w/g, letter => letter.toUpperCase());
+
+            taskCard.querySelector('.card').classList.toggle('border-danger', task.is_overdue);
+            taskCard.querySelector('.card-title').textContent = task.title;
+            const description = taskCard.querySelector('.card-text');
+            if (description) {
+                description.textContent = App.utils.truncateText(task.description || '');
+            }
+
+            const toggleIcon = taskCard.querySelector('[data-role="toggle-icon"]');
+            toggleIcon.className = `fas fa-${completed ? 'undo' : 'check'} me-2`;
+            taskCard.querySelector('[data-role="toggle-label"]').textContent = `Mark as ${completed ? 'Pending' : 'Completed'}`;
+
+            const due = taskCard.querySelector('[data-role="due"]');
+            due.classList.toggle('d-none', !task.due_date);
+            due.classList.toggle('text-danger', task.is_overdue);
+            due.querySelector('[data-role="overdue-icon"]').classList.toggle('d-none', !task.is_overdue);
+            due.querySelector('.local-date').textContent = task.due_date || '';
+            if (task.due_date) {
+                window.formatLocalDateTimes(due);
+            }
+
+            const completedAt = taskCard.querySelector('[data-role="completed"]');
+            completedAt.classList.toggle('d-none', !task.completed_at);
+            if (task.completed_at) {
+                completedAt.querySelector('.local-time').textContent = task.completed_at;
+                window.formatLocalDateTimes(completedAt);
+            }
+        }
+    },
+
+    // Live updates pushed by the server over /api/events
+    events: {
+        source: null,
+        connected: false,
+        noticeShown: false,
+
+        // Open the stream on pages that show tasks or statistics
+        connect: function () {
+            if (!window.EventSource || !document.querySelector('[data-live-events]')) {
+                return;
+            }
+
+            const source = new EventSource(`${App.config.apiBase}/events`);
+            this.source = source;
+
+            source.addEventListener('ready', () => {
+                // Events sent while reconnecting were missed
+                if (this.connected) {
+                    this.changed();
+                }
+                this.connected = true;
+            });
+            source.addEventListener('resync', () => this.changed());
+
+            source.addEventListener('task.updated', event => {
+                App.tasks.applyUpdate(JSON.parse(event.data).task);
+                this.refreshStatistics();
+            });
+            source.addEventListener('task.deleted', event => {
+                App.tasks.removeCard(JSON.parse(event.data).id);
+                this.refreshStatistics();
+            });
+            source.addEventListener('tasks.deleted', event => {
+                JSON.parse(event.data).ids.forEach(id => App.tasks.removeCard(id));
+                this.refreshStatistics();
+            });
+
+            // New tasks and bulk changes cannot be placed in the list without a reload
+            ['task.created', 'tasks.created', 'tasks.updated', 'tasks.imported'].forEach(type => {
+                source.addEventListener(type, () => this.changed());
+            });
+        },
+
+        // Offer a reload of the task list and refresh the counts
+        changed: function () {
+            this.refreshStatistics();
+            if (document.getElementById('task-list') && !this.noticeShown) {
+                this.noticeShown = true;
+                App.showAlert('info', 'Your tasks have changed. <a href="" class="alert-link">Refresh</a> to see the latest.', 0);
+            }
         }
     },
 
@@ -415,6 +564,29 @@ const App = {
     }
 };
 
+// Coalesce bursts of events into one statistics request
+App.events.refreshStatistics = App.debounce(async function () {
+    const counts = document.querySelectorAll('[data-stat]');
+    if (!counts.length) {
+        return;
+    }
+
+    try {
+        const data = await App.api.getStatistics();
+        const values = {
+            total: data.user_statistics.total,
+            completed: data.user_statistics.completed,
+            pending: data.user_statistics.pending,
+            overdue: data.overdue_tasks
+        };
+        counts.forEach(element => {
+            element.textContent = values[element.dataset.stat];
+        });
+    } catch (error) {
+        console.error('Error refreshing statistics:', error);
+    }
+}, 1000);
+
 // Initialize app when DOM is loaded
 document.addEventListener('DOMContentLoaded', function () {
     App.init();
@@ -454,8 +626,8 @@ document.addEventListener('DOMContentLoaded', function() {
     /**
      * Converts UTC timestamp strings to the user's local date and time.
      */
-    function formatLocalTimes() {
-        const timeElements = document.querySelectorAll('.local-time');
+    function formatLocalTimes(root = document) {
+        const timeElements = root.querySelectorAll('.local-time');
         timeElements.forEach(el => {
             const utcDateString = el.textContent.trim();
             if (utcDateString) {
@@ -477,8 +649,8 @@ document.addEventListener('DOMContentLoaded', function() {
     /**
      * Converts UTC timestamp strings to the user's local date only.
      */
-    function formatLocalDates() {
-        const dateElements = document.querySelectorAll('.local-date');
+    function formatLocalDates(root = document) {
+        const dateElements = root.querySelectorAll('.local-date');
         dateElements.forEach(el => {
             const utcDateString = el.textContent.trim();
             if (utcDateString) {
@@ -497,4 +669,10 @@ document.addEventListener('DOMContentLoaded', function() {
     // Run the functions to format all dates and times on the page
     formatLocalTimes();
     formatLocalDates();
+
+    // Allow content added later (e.g. "Load More") to be formatted too
+    window.formatLocalDateTimes = function (root) {
+        formatLocalTimes(root);
+        formatLocalDates(root);
+    };
 });
@@ -0,0 +1,21 @@
+import argparse
+from .main import app
+from .jobs import job_queue, WorkerPool
+from .database_handler import DatabaseHandler
+
+
+def main(argv=None):
+    """Run background job workers until interrupted"""
+    parser = argparse.ArgumentParser(description="Run TaskFlow background job workers")
+    parser.add_argument('--concurrency', type=int, default=app.config['JOB_WORKERS'],
+                        help="number of worker threads (default: JOB_WORKERS)")
+    args = parser.parse_args(argv)
+    pool = WorkerPool(job_queue, args.concurrency, app.config['JOB_POLL_INTERVAL'])
+    handler = DatabaseHandler()
+    pool.every(app.config['DEADLINE_SWEEP_INTERVAL'], handler.sweep_deadline_summaries)
+    pool.every(app.config['SYNC_PRUNE_INTERVAL'], handler.prune_task_deletions)
+    pool.run_forever()
+
+
+if __name__ == "__main__":
+    main()
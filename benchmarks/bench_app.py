@@ -0,0 +1,322 @@
+"""Benchmark DatabaseHandler methods and the main routes against a seeded database.
+
+Usage: python benchmarks/bench_app.py [--users 50] [--tasks 2000] [--db path] [--reseed]
+                                      [--iterations 200] [--requests 500] [--concurrency 8]
+                                      [--base-url http://127.0.0.1:5000] [--json out.json]
+                                      [--baseline old.json] [--max-regression 0.2]
+
+The database is seeded once with users x tasks rows and reused by later runs
+(pass --reseed to rebuild it). Routes are driven through the Flask test client
+unless --base-url points at a running server, e.g. a local gunicorn started
+with DATABASE_URL=sqlite:///<same --db path>. Results are percentiles in
+milliseconds and throughput; --baseline compares p95s with an earlier --json
+file and exits non-zero when any got slower than --max-regression allows.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_PASSWORD = 'benchmark-password'
+WORDS = ['report', 'review', 'deploy', 'invoice', 'meeting', 'design', 'budget', 'release',
+         'client', 'backup', 'audit', 'roadmap', 'hiring', 'migration', 'newsletter', 'security']
+ROUTES = [
+    '/dashboard',
+    '/tasks',
+    '/tasks?search={word}',
+    '/api/tasks',
+    '/api/tasks?limit=200',
+    '/api/statistics',
+]
+
+
+def percentiles(samples, elapsed=None):
+    """Summarise latencies (seconds) as milliseconds, plus throughput if elapsed is given"""
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] * 1000
+
+    result = {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': rank(50),
+        'p95_ms': rank(95),
+        'p99_ms': rank(99),
+        'max_ms': ordered[-1] * 1000,
+    }
+    if elapsed:
+        result['throughput_per_sec'] = len(ordered) / elapsed
+    return result
+
+
+def seed(users, tasks_per_user, rng):
+    """Fill an empty database with users x tasks rows using bulk inserts"""
+    from TaskFlow.app import db
+    from TaskFlow.models import User, Task
+    from TaskFlow.passwords import password_hasher
+    from TaskFlow.routes import db_handler
+
+    password_hash = password_hasher.policy.hash(BENCH_PASSWORD)
+    now = datetime.utcnow()
+    db.session.execute(User.__table__.insert(), [
+        {'username': f'bench{n}', 'email': f'bench{n}@example.com', 'password_hash': password_hash,
+         'created_at': now, 'updated_at': now}
+        for n in range(1, users + 1)
+    ])
+    user_ids = [row.id for row in db.session.execute(db.select(User.id).order_by(User.id))]
+
+    for user_id in user_ids:
+        rows = []
+        for n in range(tasks_per_user):
+            created_at = now - timedelta(days=rng.uniform(0, 365))
+            status = rng.choices(Task.STATUSES, weights=(5, 2, 3))[0]
+            due_date = None if rng.random() < 0.2 else now + timedelta(days=rng.uniform(-60, 60))
+            rows.append({
+                'title': f'{rng.choice(WORDS)} {rng.choice(WORDS)} task {n}',
+                'description': None if rng.random() < 0.3 else ' '.join(rng.choices(WORDS, k=12)),
+                'status': status,
+                'priority': rng.choice(Task.PRIORITIES),
+                'due_date': due_date,
+                'created_at': created_at,
+                'updated_at': created_at,
+                'completed_at': created_at if status == 'completed' else None,
+                'user_id': user_id,
+            })
+        db.session.execute(Task.__table__.insert(), rows)
+    db.session.commit()
+    db_handler.rebuild_task_counters()
+    return user_ids
+
+
+def bench_handler(user_ids, iterations, rng):
+    """Time each read-heavy DatabaseHandler method with the statistics cache disabled"""
+    from TaskFlow.app import db
+    from TaskFlow.cache import StatsCache
+    from TaskFlow.database_handler import DatabaseHandler
+
+    class NoCache(StatsCache):
+        def get(self, key):
+            return None
+
+        def set(self, key, value):
+            pass
+
+        def delete(self, key):
+            pass
+
+    handler = DatabaseHandler(stats_cache=NoCache())
+    methods = {
+        'get_tasks_page': lambda user_id: handler.get_tasks_page(user_id, limit=50),
+        'get_tasks_page(status=pending)': lambda user_id: handler.get_tasks_page(user_id, status='pending', limit=50),
+        'get_task_counts': handler.get_task_counts,
+        'get_dashboard_snapshot': handler.get_dashboard_snapshot,
+        'search_tasks': lambda user_id: handler.search_tasks(rng.choice(WORDS), user_id=user_id, limit=50),
+        'get_overdue_tasks': lambda user_id: handler.get_overdue_tasks(user_id=user_id),
+        'get_tasks_due_soon': lambda user_id: handler.get_tasks_due_soon(user_id=user_id),
+        'get_recent_activity': lambda user_id: handler.get_recent_activity(user_id=user_id),
+        'get_task_priority_statistics': lambda user_id: handler.get_task_priority_statistics(user_id=user_id),
+        'get_user_task_statistics': lambda user_id: handler.get_user_task_statistics(),
+        'stream_tasks': lambda user_id: sum(1 for _ in handler.stream_tasks(user_id)),
+    }
+
+    results = {}
+    for name, method in methods.items():
+        samples = []
+        for _ in range(iterations):
+            user_id = rng.choice(user_ids)
+            start = time.perf_counter()
+            method(user_id)
+            samples.append(time.perf_counter() - start)
+            db.session.remove()
+        results[name] = percentiles(samples)
+        print(f"  {name:<32} p50 {results[name]['p50_ms']:8.2f} ms  p95 {results[name]['p95_ms']:8.2f} ms  "
+              f"p99 {results[name]['p99_ms']:8.2f} ms")
+    return results
+
+
+class TestClientSession:
+    """Logged-in Flask test client for one benchmark thread"""
+
+    def __init__(self, username):
+        from TaskFlow.app import app
+        self.client = app.test_client()
+        response = self.client.post('/login', data={'username': username, 'password': BENCH_PASSWORD})
+        if response.status_code != 302:
+            raise RuntimeError(f'Login failed for {username}: {response.status_code}')
+
+    def get(self, path):
+        response = self.client.get(path)
+        response.close()
+        return response.status_code
+
+
+class HTTPSession:
+    """Logged-in urllib session against a running server"""
+
+    def __init__(self, base_url, username):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        body = urllib.parse.urlencode({'username': username, 'password': BENCH_PASSWORD}).encode()
+        with self.opener.open(self.base_url + '/login', data=body) as response:
+            if '/login' in response.url:
+                raise RuntimeError(f'Login failed for {username}')
+
+    def get(self, path):
+        try:
+            with self.opener.open(self.base_url + path) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def bench_routes(user_ids, requests, concurrency, base_url, rng):
+    """Drive each route with concurrent logged-in clients and time every request"""
+    sessions = []
+    for n in range(concurrency):
+        username = f'bench{user_ids[n % len(user_ids)]}'
+        sessions.append(HTTPSession(base_url, username) if base_url else TestClientSession(username))
+
+    results = {}
+    for route in ROUTES:
+        samples = []
+        errors = []
+        lock = threading.Lock()
+        per_thread = max(1, requests // concurrency)
+
+        def worker(session, seed_value):
+            local_rng = random.Random(seed_value)
+            local_samples = []
+            local_errors = 0
+            for _ in range(per_thread):
+                path = route.format(word=local_rng.choice(WORDS))
+                start = time.perf_counter()
+                status = session.get(path)
+                local_samples.append(time.perf_counter() - start)
+                if status >= 400:
+                    local_errors += 1
+            with lock:
+                samples.extend(local_samples)
+                errors.append(local_errors)
+
+        threads = [threading.Thread(target=worker, args=(session, rng.random())) for session in sessions]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        results[route] = percentiles(samples, elapsed)
+        results[route]['errors'] = sum(errors)
+        print(f"  {route:<32} p50 {results[route]['p50_ms']:8.2f} ms  p95 {results[route]['p95_ms']:8.2f} ms  "
+              f"p99 {results[route]['p99_ms']:8.2f} ms  {results[route]['throughput_per_sec']:8.1f} req/s  "
+              f"errors {results[route]['errors']}")
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """Print p95 changes against a baseline run; return True if any exceeded max_regression"""
+    regressed = False
+    print(f'\nComparison with baseline (p95, allowed slowdown {max_regression:.0%}):')
+    for section in ('handler', 'routes'):
+        for name, current in results.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous:
+                continue
+            ratio = current['p95_ms'] / previous['p95_ms'] if previous['p95_ms'] else 1.0
+            flag = ''
+            if ratio > 1 + max_regression:
+                flag = '  REGRESSION'
+                regressed = True
+            print(f"  {section}:{name:<40} {previous['p95_ms']:8.2f} -> {current['p95_ms']:8.2f} ms "
+                  f"({ratio - 1:+.0%}){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50, help='users to seed')
+    parser.add_argument('--tasks', type=int, default=2000, help='tasks to seed per user')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'taskflow_bench.db'),
+                        help='SQLite file to seed and benchmark against')
+    parser.add_argument('--reseed', action='store_true', help='delete and reseed the database first')
+    parser.add_argument('--iterations', type=int, default=200, help='calls per DatabaseHandler method')
+    parser.add_argument('--requests', type=int, default=500, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent route clients')
+    parser.add_argument('--base-url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--skip-handler', action='store_true', help='only benchmark routes')
+    parser.add_argument('--skip-routes', action='store_true', help='only benchmark DatabaseHandler')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for data and request mix')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='earlier --json output to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='allowed p95 slowdown, 0.2 = 20%%')
+    args = parser.parse_args()
+
+    if args.reseed and os.path.exists(args.db):
+        os.remove(args.db)
+    # Importing TaskFlow initialises the app against this database
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.db)}'
+
+    from TaskFlow.app import app, db
+    from TaskFlow.models import User
+    import TaskFlow.routes  # noqa: F401
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        user_ids = [row.id for row in db.session.execute(db.select(User.id).filter(User.username.like('bench%')))]
+        if not user_ids:
+            print(f'Seeding {args.users} users x {args.tasks} tasks into {args.db}...')
+            start = time.perf_counter()
+            user_ids = seed(args.users, args.tasks, rng)
+            print(f'Seeded in {time.perf_counter() - start:.1f} s')
+
+        results = {
+            'meta': {
+                'timestamp': datetime.utcnow().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'database': args.db,
+                'users': len(user_ids),
+                'tasks_per_user': args.tasks,
+                'iterations': args.iterations,
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+                'target': args.base_url or 'test-client',
+            },
+        }
+
+        if not args.skip_handler:
+            print('DatabaseHandler:')
+            results['handler'] = bench_handler(user_ids, args.iterations, rng)
+
+    if not args.skip_routes:
+        print(f"Routes ({args.concurrency} concurrent clients, {results['meta']['target']}):")
+        results['routes'] = bench_routes(user_ids, args.requests, args.concurrency, args.base_url, rng)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results written to {args.json}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            if compare(results, json.load(f), args.max_regression):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
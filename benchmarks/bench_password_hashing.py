@@ -0,0 +1,87 @@
+"""Report password hashes/sec for each hashing policy setting.
+
+Usage: python benchmarks/bench_password_hashing.py [--seconds 2] [--json out.json]
+                                                  [--setting bcrypt:12 ...]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Importing TaskFlow initialises the app; keep it off the real database
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TaskFlow.passwords import PasswordPolicy, PasswordHasher, verify_password_hash  # noqa: E402
+
+DEFAULT_SETTINGS = [
+    'bcrypt:10', 'bcrypt:12', 'bcrypt:14',
+    'scrypt:16384', 'scrypt:32768', 'scrypt:65536',
+    'pbkdf2:600000', 'pbkdf2:1000000',
+]
+PASSWORD = 'correct horse battery staple'
+
+
+def rate(func, seconds):
+    """Call func repeatedly for about the given time; return calls per second"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+
+def pooled_rate(hasher, password_hash, seconds, concurrency):
+    """Verifications per second with concurrency callers sharing one PasswordHasher"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def worker():
+        return rate(lambda: hasher.verify(password_hash, PASSWORD), seconds)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as callers:
+        return sum(callers.map(lambda _: worker(), range(concurrency)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--setting', action='append', help='algorithm:cost, may be repeated')
+    parser.add_argument('--seconds', type=float, default=2.0, help='time spent per measurement')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='hashing pool size')
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    for setting in args.setting or DEFAULT_SETTINGS:
+        algorithm, _, cost = setting.partition(':')
+        try:
+            policy = PasswordPolicy(algorithm, cost or None)
+        except (ValueError, RuntimeError) as e:
+            print(f'{setting:<18} skipped: {e}')
+            continue
+
+        password_hash = policy.hash(PASSWORD)
+        hasher = PasswordHasher(policy, workers=args.workers, queue_size=args.workers)
+        result = {
+            'setting': policy.method,
+            'hashes_per_sec': rate(lambda: policy.hash(PASSWORD), args.seconds),
+            'verifies_per_sec': rate(lambda: verify_password_hash(password_hash, PASSWORD), args.seconds),
+            'pooled_verifies_per_sec': pooled_rate(hasher, password_hash, args.seconds, args.workers),
+            'workers': args.workers,
+        }
+        results.append(result)
+        print(f"{result['setting']:<24} hash {result['hashes_per_sec']:8.1f}/s  "
+              f"verify {result['verifies_per_sec']:8.1f}/s  "
+              f"pooled verify x{args.workers} {result['pooled_verifies_per_sec']:8.1f}/s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results written to {args.json}')
+
+
+if __name__ == '__main__':
+    main()